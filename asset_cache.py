@@ -0,0 +1,81 @@
+import json
+import os
+from PyQt6 import QtCore, QtGui
+from PyQt6.QtCore import Qt
+from prepare_assets import ASSET_DIR, MANIFEST
+
+
+class PixmapCache:
+    """Load client images lazily, in the smallest prepared size that covers the request.
+
+    Variants come from prepare_assets.py; without them (or for sizes larger
+    than every variant) the original image is used. Each file is decoded
+    at most once and shared by every window.
+    """
+
+    def __init__(self, manifest_path=MANIFEST):
+        self.pixmaps = {}  # path -> QPixmap
+        try:
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def path_for(self, name, width):
+        for variant in self.manifest.get(name, {}).get("variants", ()):  # sorted by width
+            if variant["width"] >= width and os.path.exists(variant["path"]):
+                return variant["path"]
+        return os.path.join(ASSET_DIR, name)
+
+    def get(self, name, size, device_pixel_ratio=1.0):
+        """QPixmap of images/<name> at least size.width() device pixels wide (if available)."""
+        path = self.path_for(name, size.width() * device_pixel_ratio)
+        pixmap = self.pixmaps.get(path)
+        if pixmap is None:
+            pixmap = self.pixmaps[path] = QtGui.QPixmap(path)
+        return pixmap
+
+
+pixmap_cache = PixmapCache()  # shared by all windows
+
+
+class BackgroundMixin:
+    """Paint a window background from the pixmap cache instead of a stylesheet url().
+
+    mode "stretch" fills the window (like border-image), "cover" keeps the
+    aspect ratio and crops. The scaled pixmap is kept until the window is
+    resized.
+    """
+    background_name = None
+    background_mode = "stretch"
+
+    def resizeEvent(self, event):
+        self._scaled_background = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self.background_name is not None:
+            if getattr(self, "_scaled_background", None) is None:
+                self._scaled_background = self._scale_background()
+            painter = QtGui.QPainter(self)
+            painter.drawPixmap(0, 0, self._scaled_background)
+            painter.end()
+        super().paintEvent(event)
+
+    def _scale_background(self):
+        ratio = self.devicePixelRatioF()
+        target = self.size() * ratio  # device pixels, so HiDPI screens get a sharp image
+        pixmap = pixmap_cache.get(self.background_name, self.size(), ratio)
+        if pixmap.isNull():
+            scaled = QtGui.QPixmap(target)
+            scaled.fill(Qt.GlobalColor.transparent)
+        else:
+            aspect = (Qt.AspectRatioMode.IgnoreAspectRatio if self.background_mode == "stretch"
+                      else Qt.AspectRatioMode.KeepAspectRatioByExpanding)
+            scaled = pixmap.scaled(target, aspect, Qt.TransformationMode.SmoothTransformation)
+            if scaled.size() != target:  # cover: crop the overflow evenly
+                rect = QtCore.QRect(QtCore.QPoint(0, 0), target)
+                rect.moveCenter(scaled.rect().center())
+                scaled = scaled.copy(rect)
+        scaled.setDevicePixelRatio(ratio)
+        return scaled
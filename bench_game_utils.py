@@ -0,0 +1,139 @@
+"""Micro-benchmarks for the GameUtils hot paths on synthetic lexicons.
+
+Runs normalize, generate_sequences (cold build and warm load of the
+sequence index), pick_sequence (uniform and difficulty-weighted) and
+verify (local lexicon, and milog markup served by a local stub) for
+lexicons of increasing size. Results are written as JSON so runs from
+different commits can be compared.
+
+    python bench_game_utils.py --sizes 1000 10000 100000 500000 --output bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from challenge_sampler import ChallengeSampler
+from milog_stub import StubMilogServer
+from sequence_index import SequenceIndex
+from server import GameUtils
+from word_validator import LexiconValidator, MilogValidator
+
+HEBREW_LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+FINAL_FORMS = {'כ': 'ך', 'מ': 'ם', 'נ': 'ן', 'פ': 'ף', 'צ': 'ץ'}
+
+
+def synthetic_lexicon(size, rng):
+    words = set()
+    while len(words) < size:
+        word = ''.join(rng.choice(HEBREW_LETTERS) for _ in range(rng.randint(3, 9)))
+        words.add(word[:-1] + FINAL_FORMS.get(word[-1], word[-1]))
+    return sorted(words)
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return time.perf_counter() - start
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_size(size, verify_calls, rng, stub, workdir):
+    words = synthetic_lexicon(size, rng)
+    word_list = os.path.join(workdir, f"words_{size}.txt")
+    with open(word_list, 'w', encoding='utf-8') as f:
+        f.write("\n".join(words))
+    results = []
+
+    def add(name, ops, seconds):
+        results.append({"name": name, "size": size, "ops": ops, "seconds": seconds,
+                        "us_per_op": seconds / ops * 1e6})
+
+    add("normalize", len(words), timed(lambda: [GameUtils.normalize(w) for w in words], 1))
+
+    # the first call builds and saves the index, later ones only load it
+    add("generate_sequences_cold", 1, timed(lambda: GameUtils.generate_sequences(word_list), 1))
+    add("generate_sequences_warm", 5, timed(lambda: GameUtils.generate_sequences(word_list), 5))
+
+    index = SequenceIndex.load_or_build(word_list, GameUtils.normalize)
+    sequences_2, sequences_3 = index.sequences_2, index.sequences_3
+    picks = 100000
+    add("pick_sequence_uniform", picks, timed(lambda: GameUtils.pick_sequence(sequences_2, sequences_3), picks))
+    start = time.perf_counter()
+    sampler = ChallengeSampler(index.counts)
+    add("challenge_sampler_build", 1, time.perf_counter() - start)
+    add("pick_sequence_weighted", picks,
+        timed(lambda: GameUtils.pick_sequence(sequences_2, sequences_3, sampler, rng.random()), picks))
+
+    lexicon = LexiconValidator(word_list, GameUtils.normalize)
+    sample = [rng.choice(words) for _ in range(picks)]
+    it = iter(sample)
+    add("verify_lexicon", picks, timed(lambda: GameUtils.verify(next(it), "", lexicon), picks))
+
+    stub.words = set(words)
+    milog = MilogValidator(url=stub.url)
+    it = iter(sample)
+    add("verify_milog_stub", verify_calls, timed(lambda: GameUtils.verify(next(it), "", milog), verify_calls))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GameUtils hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 500000])
+    parser.add_argument("--verify-calls", type=int, default=200, help="HTTP verifications per size")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="seconds the milog stub waits")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    stub = StubMilogServer(latency=args.stub_latency).start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for size in args.sizes:
+                for row in bench_size(size, args.verify_calls, rng, stub, workdir):
+                    print(f"{row['name']:<26}{row['size']:>9}{row['us_per_op']:>14.2f} us/op")
+                    results.append(row)
+    finally:
+        stub.stop()
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            "commit": git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "seed": args.seed,
+            "results": results,
+        }, f, indent=2)
+    print(f"results written to {args.output}")
+    if args.baseline:
+        compare(args.baseline, results)
+
+
+def compare(baseline_path, results):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {(row["name"], row["size"]): row["us_per_op"] for row in baseline["results"]}
+    print(f"compared with {baseline_path} ({baseline.get('commit')}):")
+    for row in results:
+        old = before.get((row["name"], row["size"]))
+        if old:
+            print(f"{row['name']:<26}{row['size']:>9}{row['us_per_op'] / old:>10.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import json
+import math
+import random
+
+
+class AliasTable:
+    """Vose's alias method: O(1) draws from a fixed discrete distribution."""
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("AliasTable needs at least one positive weight")
+        self.prob = [0.0] * n
+        self.alias = [0] * n
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in small + large:  # leftovers are 1.0 up to rounding
+            self.prob[i] = 1.0
+
+    def draw(self, rng=random):
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class ChallengeSampler:
+    """Draw challenge sequences close to a target difficulty in O(1).
+
+    A sequence's difficulty is 0.0 for the most common one and 1.0 for one
+    that a single word contains (log scale of its solution count). Sequences
+    are grouped into `buckets` difficulty bands; for each of `levels` target
+    difficulties an alias table over the bands is precomputed, and a draw is
+    one alias lookup plus a uniform pick inside the chosen band.
+
+    `measured` maps sequences to difficulties observed in recorded games
+    (see load_difficulty_table); those replace the solution-count estimate.
+    """
+
+    def __init__(self, counts, buckets=20, levels=21, spread=0.12, rng=random, measured=None):
+        self.rng = rng
+        self.levels = levels
+        max_count = max(counts.values())
+        log_max = math.log(max_count) if max_count > 1 else 1.0
+
+        self.difficulties = {seq: 1.0 - math.log(max(count, 1)) / log_max for seq, count in counts.items()}
+        if measured:
+            self.difficulties.update((seq, d) for seq, d in measured.items() if seq in self.difficulties)
+        self.bands = [[] for _ in range(buckets)]
+        for seq, difficulty in self.difficulties.items():
+            self.bands[min(buckets - 1, int(difficulty * buckets))].append(seq)
+        self.bands = [band for band in self.bands if band]  # an empty band can never be drawn
+
+        centers = [sum(self.difficulties[seq] for seq in band) / len(band) for band in self.bands]
+        self.tables = []
+        for level in range(levels):
+            target = level / (levels - 1)
+            weights = [math.exp(-((c - target) ** 2) / (2 * spread ** 2)) + 1e-9 for c in centers]
+            self.tables.append(AliasTable(weights))
+
+    def draw(self, difficulty):
+        """Draw a sequence for a target difficulty between 0.0 (easy) and 1.0 (hard)."""
+        difficulty = min(1.0, max(0.0, difficulty))
+        table = self.tables[round(difficulty * (self.levels - 1))]
+        band = self.bands[table.draw(self.rng)]
+        return band[self.rng.randrange(len(band))]
+
+
+def load_difficulty_table(path, min_turns=20):
+    """{sequence: difficulty} from a table written by difficulty_analytics.py.
+
+    Sequences seen in fewer than min_turns turns are left out, so their
+    difficulty stays the solution-count estimate.
+    """
+    with open(path, encoding='utf-8') as f:
+        table = json.load(f)
+    return {seq: min(1.0, max(0.0, row["difficulty"])) for seq, row in table["sequences"].items()
+            if row["turns"] >= min_turns}
+
+
+class DifficultyCurve:
+    """Map the state of a game to a target difficulty for the next challenge."""
+
+    def __init__(self, start=0.2, end=0.8, lives_to_max=6, turns_to_max=None):
+        self.start = start
+        self.end = end
+        self.lives_to_max = lives_to_max  # lives lost in the game until the curve tops out
+        self.turns_to_max = turns_to_max  # or ramp by turns played instead
+
+    def __call__(self, turn, lives_lost):
+        if self.turns_to_max:
+            progress = turn / self.turns_to_max
+        elif self.lives_to_max:
+            progress = lives_lost / self.lives_to_max
+        else:
+            progress = 0.0
+        return self.start + (self.end - self.start) * min(1.0, progress)
+
+
+# named curves a game can be configured with; None keeps the original uniform 70/30 pick
+DIFFICULTY_CURVES = {
+    "classic": None,
+    "easy": DifficultyCurve(0.1, 0.3),
+    "ramp": DifficultyCurve(0.2, 0.8),
+    "hard": DifficultyCurve(0.6, 1.0),
+    "marathon": DifficultyCurve(0.1, 0.9, turns_to_max=60),
+}
@@ -1,13 +1,16 @@
-import socket
+import json
 import threading
 import sys
-from encryption_manager import EncryptionManager
-from PyQt6 import QtWidgets
+from collections import deque
+from client_connection import Client
 
 from game_screen import Ui_GameWindow
+from player_list_model import PlayerListModel, PlayerItemDelegate
+from asset_cache import BackgroundMixin
+import text_delta
 from welcome import Ui_MainWindow
-from PyQt6.QtWidgets import QApplication, QMainWindow, QLabel, QWidget
-from PyQt6.QtCore import QTimer, Qt
+from PyQt6.QtWidgets import QApplication, QMainWindow, QLabel, QListView
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
 
 class MessageHandler:
     @staticmethod
@@ -18,6 +21,7 @@ class MessageHandler:
     @staticmethod
     def handle_turn_start(window, letters):
         window.clear_input()
+        window.begin_turn()
         window.update_info_text(letters)
         window.update_status("🎯 Your Turn!", "cyan")
         window.input_box.setPlaceholderText("הכנס מילה כאן")
@@ -28,12 +32,17 @@ class MessageHandler:
     def handle_update_input(window, others_inputs):
         window.display_inputs_of_other_clients(others_inputs)
 
+    @staticmethod
+    def handle_update_delta(window, delta):
+        window.apply_input_delta(delta)
+
     @staticmethod
     def handle_update_letters(window, others_inputs):
         window.update_info_text(others_inputs)
 
     @staticmethod
     def handle_valid_word(window):
+        window.end_turn()
         window.set_input_enabled(False)
         window.update_status("✅ Valid Word!", "green")
         window.clear_input()
@@ -41,6 +50,7 @@ class MessageHandler:
 
     @staticmethod
     def handle_time_up(window):
+        window.end_turn()
         window.set_input_enabled(False)
         window.clear_input()
         window.update_status("⏰ Time's Up!", "orange")
@@ -76,94 +86,142 @@ class MessageHandler:
         value, player_list_str = value.split(":")
         player_names = player_list_str.split(",")
         if value == "GAME_STARTED":
+            window.overlay.hide()  # the last game's result
             window.start_button.setEnabled(False)  # enable the button
             window.start_button.hide()  # show the button
             window.fill_players_hearts(player_names, lives)
         elif value == "YOU_ARE_THE_HOST":
+            window.start_button.show()  # hidden while the last game ran
             window.start_button.setEnabled(True)  # enable the button
 
-def handle_server_messages(client, window):
-    try:
-        message_handlers = {
+    @staticmethod
+    def handle_room_list(value):
+        # rooms are joined with Client.join_room; the list is only shown here
+        rooms = [room.split(":") for room in value.split(",") if room]
+        print("rooms: " + ", ".join(f"{name} ({count} players)" for name, count in rooms))
+
+    @staticmethod
+    def handle_state(window, value):
+        # sent after a resumed connection: redraw everything from the snapshot
+        state = json.loads(value)
+        window.update_player_list(state["players"])
+        for name, lives in state["lives"].items():
+            window.update_hearts(name, lives)
+        window.start_button.setEnabled(state["host"])
+        if state["started"]:
+            window.start_button.hide()
+        window.end_turn()
+        window.clear_input()
+        if "turn" not in state:
+            return
+        window.update_info_text(state["letters"])
+        if state["turn"] == state["you"]:
+            MessageHandler.handle_turn_start(window, state["letters"])
+            window.input_box.setText(state["typed"])  # the server already has this text
+            window.sent_text = state["typed"]
+        else:
+            window.set_input_enabled(False)
+            window.display_inputs_of_other_clients(state["typed"])
+
+
+class UiDispatcher(QObject):
+    """Hand server messages from the network thread to the GUI thread, once per frame.
+
+    post() may be called from any thread. Messages are applied on the GUI
+    thread at most every frame_ms; within a frame only the last
+    UPDATE_INPUT, UPDATE_LETTERS and PLAYER_LIST are applied, since each
+    replaces what the previous one showed, and UPDATE_DELTAs before the
+    last UPDATE_INPUT are skipped for the same reason.
+    """
+    COALESCED = ("UPDATE_INPUT", "UPDATE_LETTERS", "PLAYER_LIST")
+    wake = pyqtSignal()
+
+    def __init__(self, window, frame_ms=16):
+        super().__init__()
+        self.frame_ms = frame_ms
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.scheduled = False
+        self.handlers = {
             "ADMIN": lambda values: MessageHandler.handle_admin(window, values),
             "GAME_OVER": lambda values: MessageHandler.handle_game_over(window, values),
             "TURN_START": lambda values: MessageHandler.handle_turn_start(window, values),
             "UPDATE_INPUT": lambda values: MessageHandler.handle_update_input(window, values),
+            "UPDATE_DELTA": lambda values: MessageHandler.handle_update_delta(window, values),
             "UPDATE_LETTERS": lambda values: MessageHandler.handle_update_letters(window, values),
             "VALID_WORD": lambda values: MessageHandler.handle_valid_word(window),
             "TIME_UP": lambda values: MessageHandler.handle_time_up(window),
             "PLAYER_LOST_LIFE": lambda values: MessageHandler.handle_life_lost(window, values),
             "INVALID_WORD": lambda values: MessageHandler.handle_invalid_word(window, values),
             "USED_WORD": lambda values: MessageHandler.handle_used_word(window, values),
-            "PLAYER_LIST": lambda values: MessageHandler.handle_player_list(window, values)
-
+            "PLAYER_LIST": lambda values: MessageHandler.handle_player_list(window, values),
+            "STATE": lambda values: MessageHandler.handle_state(window, values),
+            "ROOM_LIST": lambda values: MessageHandler.handle_room_list(values)
         }
-
+        # emitted from the network thread, so Qt queues the call onto the GUI thread
+        self.wake.connect(self._schedule)
+
+    def post(self, command, value):
+        with self.lock:
+            self.pending.append((command, value))
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.wake.emit()
+
+    def _schedule(self):
+        QTimer.singleShot(self.frame_ms, self._drain)
+
+    def _drain(self):
+        with self.lock:
+            messages, self.pending = list(self.pending), deque()
+            self.scheduled = False
+        for command, value in self.coalesce(messages):
+            if command in self.handlers:
+                self.handlers[command](value)
+            else:
+                print(f"Unknown message: {command}|{value}")
+
+    @classmethod
+    def coalesce(cls, messages):
+        last = {}
+        for i, (command, _) in enumerate(messages):
+            if command in cls.COALESCED:
+                last[command] = i
+        checkpoint = last.get("UPDATE_INPUT", -1)
+        return [message for i, message in enumerate(messages)
+                if (message[0] not in cls.COALESCED or last[message[0]] == i)
+                and not (message[0] == "UPDATE_DELTA" and i < checkpoint)]
+
+
+def handle_server_messages(client, dispatcher):
+    # runs on a background thread: it must never touch widgets, only post to the dispatcher
+    try:
         while True:
-            data = client.recv_message()
-            if data.split('|')[0] != "UPDATE_INPUT":
+            try:
+                data = client.recv_message()
+            except (ConnectionError, OSError) as e:
+                print(f"Connection lost ({e}), resuming...")
+                if not client.reconnect():
+                    raise
+                continue
+            if data.split("|", 1)[0] not in ("UPDATE_INPUT", "UPDATE_DELTA"):
                 print(f"got from server: {data}")
             data_list = data.split("\n")
             for message in data_list:
                 if message != "":
-                    parts = message.split("|")
+                    parts = message.split("|", 1)  # typed text may contain "|"
                     command, value = parts[0], parts[1] if len(parts) > 1 else []
-                    if command in message_handlers:
-                        message_handlers[command](value)
-                    else:
-                        print(f"Unknown message: {message}")
+                    dispatcher.post(command, value)
 
     except Exception as e:
         print(f"Error in server message handler: {e}")
         client.close_connection()
 
 
-class Client:
-    def __init__(self, ip, port):
-        self.ip = ip
-        self.port = port
-        self.client_socket = None
-        self.encryption_manager = EncryptionManager()
-
-    def connect_to_server(self):
-        self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.client_socket.connect((self.ip, self.port))
-
-        # 1. קבל את המפתח הציבורי מהשרת
-        key_length_bytes = self.client_socket.recv(4)
-        if len(key_length_bytes) < 4:
-            raise ConnectionError("Failed to receive public key length")
-        key_length = int.from_bytes(key_length_bytes, 'big')
+class Window(BackgroundMixin, QMainWindow, Ui_MainWindow):
+    background_name = "Backgroundimg.jpg"
 
-        public_key_bytes = b""
-        while len(public_key_bytes) < key_length:
-            chunk = self.client_socket.recv(key_length - len(public_key_bytes))
-            if not chunk:
-                raise ConnectionError("Connection lost while receiving public key")
-            public_key_bytes += chunk
-
-        # טען את המפתח הציבורי
-        self.encryption_manager.load_public_key(public_key_bytes)
-
-    def send_encrypted_message(self, message: str):
-        encrypted_message = self.encryption_manager.encrypt(message)
-
-        # שלח קודם את אורך ההודעה המוצפנת (4 בייטים)
-        self.client_socket.sendall(len(encrypted_message).to_bytes(4, 'big') + encrypted_message)
-
-    def send_message(self, message):
-        if self.client_socket:
-            self.client_socket.send(message.encode())
-
-    def recv_message(self):
-        return self.client_socket.recv(1024).decode()
-
-    def close_connection(self):
-        if self.client_socket:
-            self.client_socket.close()
-
-
-class Window(QMainWindow, Ui_MainWindow):
     def __init__(self, client):
         super().__init__()
         self.client = client
@@ -176,21 +234,43 @@ class Window(QMainWindow, Ui_MainWindow):
             self.client.send_encrypted_message(entered_name)  # Send the name to the server
             # Open GameWindow
             self.game_window = GameWindow(self.client)
-            threading.Thread(target=handle_server_messages, args=(self.client, self.game_window), daemon=True).start()
+            threading.Thread(target=handle_server_messages, args=(self.client, self.game_window.dispatcher),
+                             daemon=True).start()
             self.game_window.show()
             self.close()  # Close welcome screen
 
 
-class GameWindow(QMainWindow, Ui_GameWindow):
+class GameWindow(BackgroundMixin, QMainWindow, Ui_GameWindow):
+    background_name = "Designer.jpg"
+    background_mode = "cover"
+    INPUT_INTERVAL_MS = 50
+
     def __init__(self, client):
         super().__init__()
         self.overlay = QLabel(self)
         self.client = client
-        self.displayed_players = set()
         self.saved_text = ""
-        self.player_hearts = {}  # maps player name -> QLabel showing their hearts
+        # typing is sent as INPUT_DELTA edits against sent_text, at most once per INPUT_INTERVAL_MS
+        self.sent_text = ""
+        self.my_turn = False
+        self.input_timer = QTimer(self)
+        self.input_timer.setSingleShot(True)
+        self.input_timer.setInterval(self.INPUT_INTERVAL_MS)
+        self.input_timer.timeout.connect(self.flush_typed)
         self.setupUi(self)
-        self.hearts_dic = {}
+        # one view over a model instead of a widget tree per player; rows are painted by the delegate
+        self.player_model = PlayerListModel(parent=self)
+        self.player_view = QListView()
+        self.player_view.setModel(self.player_model)
+        self.player_view.setItemDelegate(PlayerItemDelegate(self.player_view))
+        self.player_view.setUniformItemSizes(True)
+        self.player_view.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self.player_view.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.player_view.setStyleSheet("border: none; background: transparent")
+        self.player_list_layout.addWidget(self.player_view)
+        self.letters_styled = False
+        self.status_color = None
+        self.dispatcher = UiDispatcher(self)  # server messages reach the widgets through here
 
         # Connect UI events
         self.input_box.textChanged.connect(self.save_input)
@@ -201,69 +281,13 @@ class GameWindow(QMainWindow, Ui_GameWindow):
 
     def fill_players_hearts(self, players_names, lives):
         for name in players_names:
-            print(name)
-            self.hearts_dic[name] = lives
-        print(self.hearts_dic)
+            self.player_model.set_hearts(name, lives)
 
     def update_player_list(self, player_names):
-        self._player_names_to_update = player_names
-        QTimer.singleShot(0, self._apply_player_list_update)
-
-    def _apply_player_list_update(self):
-        self.clear_player_list()
-        self.player_hearts.clear()
-
-        for name in self._player_names_to_update:
-            container = QWidget()
-            layout = QtWidgets.QHBoxLayout(container)
-            layout.setContentsMargins(10, 5, 10, 5)
-            layout.setSpacing(15)
-
-            # Clean dark translucent background
-            container.setStyleSheet("""
-                background-color: rgba(0, 0, 0, 0.4);  /* Soft dark glass */
-                border-radius: 12px;
-                margin: 5px;
-            """)
-
-            # Player name label
-            name_label = QLabel(name)
-            name_label.setStyleSheet("""
-                color: white;
-                font-weight: 600;
-                font-size: 18px;
-                font-family: 'Segoe UI', sans-serif;
-            """)
-
-            # Hearts label
-            if self.hearts_dic:
-                hearts_label = QLabel("❤️" * self.hearts_dic[name])
-            else:
-                hearts_label = QLabel("❤️❤️❤️")
-            hearts_label.setStyleSheet("""
-                font-size: 18px;
-                margin-left: 5px;
-            """)
-
-            layout.addWidget(name_label)
-            layout.addWidget(hearts_label)
-
-            self.player_list_layout.addWidget(container)
-
-            self.displayed_players.add(name)
-            self.player_hearts[name] = hearts_label  # Store for future updates
+        self.player_model.set_players(player_names)
 
     def update_hearts(self, name, hearts):
-        self.hearts_dic[name] = hearts
-        if name in self.displayed_players:
-            self.player_hearts[name].setText("❤️" * hearts)
-
-    def clear_player_list(self):
-        while self.player_list_layout.count():
-            item = self.player_list_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.setParent(None)
+        self.player_model.set_hearts(name, hearts)
 
     def show_game_over(self, result: str):
         self.overlay.setGeometry(0, 0, self.width(), self.height())
@@ -290,6 +314,10 @@ class GameWindow(QMainWindow, Ui_GameWindow):
 
     def update_info_text(self, text):
         self.letters_label.setText(text)
+        if self.letters_styled:
+            return
+        # the style only changes once, from the "waiting" look to the game look
+        self.letters_styled = True
         self.letters_label.setStyleSheet("""
             color: white;
             background-color: rgba(0, 0, 0, 0.6);  /* semi-transparent black */
@@ -303,6 +331,9 @@ class GameWindow(QMainWindow, Ui_GameWindow):
 
     def update_status(self, message, color):
         self.status_label.setText(message)
+        if color == self.status_color:
+            return  # re-applying a stylesheet makes Qt re-polish the widget
+        self.status_color = color
         self.status_label.setStyleSheet(f"""
             color: {color};
             font-size: 20px;
@@ -318,11 +349,38 @@ class GameWindow(QMainWindow, Ui_GameWindow):
     def display_inputs_of_other_clients(self, client_inputs):
         self.input_box.setText(client_inputs)
 
+    def apply_input_delta(self, delta):
+        try:
+            text = text_delta.apply(self.input_box.text(), *text_delta.decode(delta))
+        except ValueError:
+            return  # out of sync; the next UPDATE_INPUT checkpoint fixes it
+        self.input_box.setText(text)
+
+    def begin_turn(self):
+        self.sent_text = ""  # the server starts every turn from empty text
+        self.my_turn = True
+
+    def end_turn(self):
+        self.my_turn = False
+        self.input_timer.stop()
+
     def save_input(self, text):
         self.saved_text = text
-        self.client.send_message(f"INPUT_CLIENT|{text}\n")
+        # the box also shows other players' typing; only our own turn is sent
+        if self.my_turn and not self.input_timer.isActive():
+            self.input_timer.start()
+
+    def flush_typed(self):
+        self.input_timer.stop()
+        text = self.input_box.text()
+        if not self.my_turn or text == self.sent_text:
+            return
+        delta = text_delta.encode(*text_delta.diff(self.sent_text, text))
+        self.sent_text = text
+        self.client.send_message(f"INPUT_DELTA|{delta}\n")
 
     def send_input(self):
+        self.flush_typed()  # the server must have the whole word before ENTER
         self.client.send_message("INPUT_CLIENT|ENTER\n")
         self.clear_input()
 
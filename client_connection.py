@@ -0,0 +1,116 @@
+import os
+import socket
+import threading
+import time
+from encryption_manager import (EncryptionManager, SessionCipher, derive_resume_key, RESUME_MARKER,
+                                RESUME_NONCE_SIZE)
+from framing import SocketReceiver
+
+
+class Client:
+    def __init__(self, ip, port):
+        self.ip = ip
+        self.port = port
+        self.client_socket = None
+        self.receiver = None
+        self.session = None
+        self.send_lock = threading.Lock()  # frames must reach the socket in the order they were sealed
+        self.encryption_manager = EncryptionManager()
+        self.session_token = None  # from the server's SESSION message; lets resume() skip RSA
+        self.resume_secret = None
+
+    def connect_to_server(self):
+        self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.client_socket.connect((self.ip, self.port))
+        public_key_bytes = self._receive_public_key()
+
+        # טען את המפתח הציבורי
+        self.encryption_manager.load_public_key(public_key_bytes)
+
+        # 2. צור מפתח סשן, הצפן אותו ב-RSA ושלח (קודם האורך, 4 בייטים)
+        session_key = SessionCipher.generate_key()
+        encrypted_key = self.encryption_manager.encrypt(session_key)
+        self.client_socket.sendall(len(encrypted_key).to_bytes(4, 'big') + encrypted_key)
+        self.session = SessionCipher(session_key, is_server=False)
+        self.receiver = SocketReceiver(self.client_socket, self.session)
+
+    def resume(self):
+        """Reconnect into the same Player with the last session token; no RSA on either side."""
+        if self.session_token is None:
+            raise ConnectionError("No session to resume")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.connect((self.ip, self.port))
+        with self.send_lock:
+            old_socket, self.client_socket = self.client_socket, sock
+            if old_socket:
+                old_socket.close()
+            self._receive_public_key()  # always sent first; not needed to resume
+            nonce = os.urandom(RESUME_NONCE_SIZE)
+            self.session = SessionCipher(derive_resume_key(self.resume_secret, self.session_token, nonce),
+                                         is_server=False)
+            sock.sendall(RESUME_MARKER + self.session_token + nonce)
+            sock.sendall(self.session.seal(b"RESUME"))
+            self.session_token = None  # single use; the server sends a new one
+            self.receiver = SocketReceiver(sock, self.session)
+
+    def reconnect(self, attempts=5, delay=0.5):
+        """Try resume() a few times with backoff; True once the session is back."""
+        for attempt in range(attempts):
+            if self.session_token is None:
+                return False
+            try:
+                self.resume()
+                return True
+            except (ConnectionError, OSError):
+                time.sleep(delay * 2 ** attempt)
+        return False
+
+    def _receive_public_key(self):
+        # 1. קבל את המפתח הציבורי מהשרת
+        key_length_bytes = self.client_socket.recv(4)
+        if len(key_length_bytes) < 4:
+            raise ConnectionError("Failed to receive public key length")
+        key_length = int.from_bytes(key_length_bytes, 'big')
+
+        public_key_bytes = b""
+        while len(public_key_bytes) < key_length:
+            chunk = self.client_socket.recv(key_length - len(public_key_bytes))
+            if not chunk:
+                raise ConnectionError("Connection lost while receiving public key")
+            public_key_bytes += chunk
+        return public_key_bytes
+
+    def send_encrypted_message(self, message: str):
+        # the first frame of the session is the player's name
+        self._send_frame(message.encode('utf-8'))
+
+    def send_message(self, message):
+        if self.client_socket:
+            self._send_frame(message.encode('utf-8'))
+
+    def _send_frame(self, plaintext: bytes):
+        with self.send_lock:
+            try:
+                self.client_socket.sendall(self.session.seal(plaintext))
+            except OSError:
+                pass  # disconnected; the receiving side notices and resumes, this message is lost
+
+    def join_room(self, room, difficulty_curve=""):
+        # rooms are created on first join; the curve only matters for a new room
+        self.send_message(f"ROOM|JOIN:{room}:{difficulty_curve}\n")
+
+    def list_rooms(self):
+        self.send_message("ROOM|LIST:\n")
+
+    def recv_message(self):
+        """Return the next complete message from the server (blocking)."""
+        while True:
+            message = self.receiver.receive()
+            if not message.startswith("SESSION|"):
+                return message
+            token, _, secret = message[len("SESSION|"):].partition(":")
+            self.session_token, self.resume_secret = bytes.fromhex(token), bytes.fromhex(secret)
+
+    def close_connection(self):
+        if self.client_socket:
+            self.client_socket.close()
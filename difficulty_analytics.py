@@ -0,0 +1,181 @@
+"""Challenge difficulty statistics from the match history.
+
+Reads the turn events recorded in history.db and computes, per challenge
+sequence:
+
+  turns         turns played with it
+  solve_rate    share of those turns ended by a valid word
+  failure_rate  share that ran out of time
+  attempts      wrong (invalid or used) submissions per turn
+  p50/p90       seconds from TURN_START to the valid word
+
+It prints a summary (2- vs 3-letter sequences, the hardest and easiest
+sequences, solve-time percentiles to tune the turn timer against) and writes a
+difficulty table the server loads with Server(difficulty_table=...).
+A sequence's score blends its failure rate, smoothed toward the overall
+rate so rarely seen sequences don't swing to 0 or 1, with its median
+solve time as a share of the turn timer. The table's difficulty is the
+score's rank among all sequences, on the same 0..1 scale the
+difficulty curves use.
+
+    python difficulty_analytics.py --db history.db --output difficulty_table.json
+"""
+import argparse
+import json
+import sqlite3
+import time
+import numpy as np
+
+VALID, TIME_UP, INVALID, USED = range(4)
+
+QUERY = """
+SELECT sequence,
+       CASE event WHEN 'valid' THEN 0 WHEN 'time_up' THEN 1 WHEN 'invalid' THEN 2 ELSE 3 END,
+       COALESCE(elapsed, -1.0)
+FROM turn_events
+WHERE event IN ('valid', 'time_up', 'invalid', 'used') AND sequence IS NOT NULL AND at >= ?
+"""
+
+
+def load_events(db_path, since=0.0, chunk_size=1_000_000):
+    """Arrays of (sequence, outcome code, seconds since TURN_START) for every turn outcome and wrong try."""
+    db = sqlite3.connect(db_path)
+    cursor = db.execute(QUERY, (since,))
+    sequences, codes, elapsed = [], [], []
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        seq_col, code_col, elapsed_col = zip(*rows)
+        sequences.append(np.array(seq_col))
+        codes.append(np.array(code_col, dtype=np.int64))
+        elapsed.append(np.array(elapsed_col, dtype=np.float64))
+    db.close()
+    if not sequences:
+        return np.array([], dtype=str), np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+    elapsed = np.concatenate(elapsed)
+    elapsed[elapsed < 0] = np.nan
+    return np.concatenate(sequences), np.concatenate(codes), elapsed
+
+
+def grouped_percentiles(group_ids, values, groups, percentiles):
+    """Nearest-rank percentiles of values per group id; NaN for groups without values."""
+    order = np.lexsort((values, group_ids))
+    sorted_values = values[order]
+    sizes = np.bincount(group_ids, minlength=groups)
+    starts = np.cumsum(sizes) - sizes
+    result = {}
+    for p in percentiles:
+        index = starts + np.rint(p / 100 * np.maximum(sizes - 1, 0)).astype(np.int64)
+        column = np.full(groups, np.nan)
+        has_values = sizes > 0
+        column[has_values] = sorted_values[index[has_values]]
+        result[p] = column
+    return result
+
+
+def sequence_stats(sequences, codes, elapsed, turn_seconds=10.0, prior_turns=10.0, time_weight=0.25):
+    names, seq_ids = np.unique(sequences, return_inverse=True)
+    groups = len(names)
+    counts = np.bincount(seq_ids * 4 + codes, minlength=groups * 4).reshape(groups, 4)
+    turns = counts[:, VALID] + counts[:, TIME_UP]
+    played = np.maximum(turns, 1)
+
+    solve_rate = counts[:, VALID] / played
+    failure_rate = counts[:, TIME_UP] / played
+    attempts = (counts[:, INVALID] + counts[:, USED]) / played
+    overall_solve_rate = counts[:, VALID].sum() / max(turns.sum(), 1)
+    smoothed_failure = 1.0 - (counts[:, VALID] + prior_turns * overall_solve_rate) / (turns + prior_turns)
+
+    solved = (codes == VALID) & ~np.isnan(elapsed)
+    times = grouped_percentiles(seq_ids[solved], elapsed[solved], groups, (50, 90))
+    time_share = np.nan_to_num(np.clip(times[50] / turn_seconds, 0.0, 1.0), nan=1.0)
+    score = (1.0 - time_weight) * smoothed_failure + time_weight * time_share
+    rank = np.empty(groups)
+    rank[np.argsort(score, kind="stable")] = np.arange(groups) / max(groups - 1, 1)
+
+    return {
+        "names": names, "turns": turns, "solve_rate": solve_rate, "failure_rate": failure_rate,
+        "attempts": attempts, "p50": times[50], "p90": times[90], "score": score, "difficulty": rank,
+    }
+
+
+def _number(value, digits=4):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def difficulty_table(stats, turn_seconds):
+    return {
+        "generated_at": time.time(),
+        "turn_seconds": turn_seconds,
+        "turns": int(stats["turns"].sum()),
+        "sequences": {
+            str(name): {
+                "turns": int(stats["turns"][i]),
+                "solve_rate": _number(stats["solve_rate"][i]),
+                "failure_rate": _number(stats["failure_rate"][i]),
+                "attempts_per_turn": _number(stats["attempts"][i]),
+                "p50_seconds": _number(stats["p50"][i], 2),
+                "p90_seconds": _number(stats["p90"][i], 2),
+                "score": _number(stats["score"][i]),
+                "difficulty": _number(stats["difficulty"][i]),
+            }
+            for i, name in enumerate(stats["names"])
+        },
+    }
+
+
+def print_summary(codes, elapsed, stats, top):
+    turns = stats["turns"]
+    print(f"{int(turns.sum())} turns over {len(stats['names'])} sequences")
+    lengths = np.char.str_len(stats["names"])
+    for length in np.unique(lengths):
+        mask = lengths == length
+        solved = stats["solve_rate"][mask] * turns[mask]
+        print(f"  {length}-letter: {int(turns[mask].sum())} turns, "
+              f"solve rate {solved.sum() / max(turns[mask].sum(), 1):.1%}")
+    solve_times = elapsed[(codes == VALID) & ~np.isnan(elapsed)]
+    if len(solve_times):
+        p50, p90, p95 = np.percentile(solve_times, (50, 90, 95))
+        print(f"  solve time p50 {p50:.2f}s, p90 {p90:.2f}s, p95 {p95:.2f}s")
+
+    order = np.argsort(stats["score"])
+    seen = order[turns[order] > 0]
+    for title, rows in (("hardest", seen[::-1][:top]), ("easiest", seen[:top])):
+        print(f"{title}:")
+        print(f"  {'seq':<6}{'turns':>8}{'solved':>9}{'timeout':>9}{'tries':>7}{'p50 s':>8}{'p90 s':>8}")
+        for i in rows:
+            print(f"  {stats['names'][i]:<6}{turns[i]:>8}{stats['solve_rate'][i]:>9.1%}"
+                  f"{stats['failure_rate'][i]:>9.1%}{stats['attempts'][i]:>7.2f}"
+                  f"{stats['p50'][i]:>8.2f}{stats['p90'][i]:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-sequence difficulty from recorded games")
+    parser.add_argument("--db", default="history.db")
+    parser.add_argument("--output", default="difficulty_table.json", help="difficulty table for the server")
+    parser.add_argument("--since", type=float, default=0.0, help="only turns after this unix time")
+    parser.add_argument("--turn-seconds", type=float, default=10.0, help="the timer the games were played with")
+    parser.add_argument("--prior-turns", type=float, default=10.0,
+                        help="weight of the overall solve rate when smoothing rarely seen sequences")
+    parser.add_argument("--time-weight", type=float, default=0.25, help="share of solve time in the score")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sequences, codes, elapsed = load_events(args.db, args.since)
+    loaded = time.perf_counter()
+    if not len(sequences):
+        raise SystemExit(f"no recorded turns in {args.db}")
+    stats = sequence_stats(sequences, codes, elapsed, args.turn_seconds, args.prior_turns, args.time_weight)
+    computed = time.perf_counter()
+    print(f"{len(sequences)} events loaded in {loaded - start:.2f}s, analysed in {computed - loaded:.2f}s")
+
+    print_summary(codes, elapsed, stats, args.top)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(difficulty_table(stats, args.turn_seconds), f, ensure_ascii=False, indent=1)
+    print(f"difficulty table written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
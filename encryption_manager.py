@@ -1,34 +1,115 @@
+import os
+import queue
+import threading
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.backends import default_backend
 
+SESSION_KEY_SIZE = 32  # AES-256-GCM
+# a reconnecting client sends this where the RSA key length would go, then a token and a nonce
+RESUME_MARKER = b"\xff\xff\xff\xff"
+RESUME_TOKEN_SIZE = 16
+RESUME_SECRET_SIZE = 32
+RESUME_NONCE_SIZE = 16
+
+
+def generate_private_key():
+    return rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=2048,
+        backend=default_backend()
+    )
+
+
+def load_or_create_private_key(key_file):
+    """Load the PEM private key in key_file, generating and saving one if it doesn't exist."""
+    try:
+        with open(key_file, 'rb') as f:
+            return serialization.load_pem_private_key(f.read(), password=None, backend=default_backend())
+    except FileNotFoundError:
+        pass
+
+    private_key = generate_private_key()
+    pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    # owner-only permissions, written to a temp file first so a crash can't leave half a key
+    tmp_file = key_file + ".tmp"
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pem)
+    os.replace(tmp_file, key_file)
+    return private_key
+
+
+class KeyPool:
+    """Generate RSA keys on a background thread so taking one is instant.
+
+    get() never generates a key itself: when the pool is drained it returns
+    None and the caller uses its shared key for that connection.
+    """
+
+    def __init__(self, size=4):
+        self.keys = queue.Queue(maxsize=size)
+        self.thread = threading.Thread(target=self._fill, daemon=True)
+        self.thread.start()
+
+    def _fill(self):
+        while True:
+            self.keys.put(generate_private_key())  # blocks while the pool is full
+
+    def get(self):
+        try:
+            return self.keys.get_nowait()
+        except queue.Empty:
+            return None  # pool drained faster than we refill it
+
+    def put_back(self, key):
+        """Return a key that was offered but never used to decrypt anything."""
+        try:
+            self.keys.put_nowait(key)
+        except queue.Full:
+            pass
+
+
 class EncryptionManager:
-    def __init__(self, is_server=False, private_key=None, public_key=None):
+    def __init__(self, is_server=False, private_key=None, public_key=None, key_file=None):
         if is_server:
-            self.private_key = rsa.generate_private_key(
-                public_exponent=65537,
-                key_size=2048,
-                backend=default_backend()
-            )
+            if private_key is not None:
+                self.private_key = private_key
+            elif key_file is not None:
+                self.private_key = load_or_create_private_key(key_file)
+            else:
+                self.private_key = generate_private_key()
             self.public_key = self.private_key.public_key()
         else:
             self.private_key = None
             self.public_key = public_key
+        self._serialized_public_key = None
 
     def get_serialized_public_key(self) -> bytes:
-        return self.public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo,
-        )
+        if self._serialized_public_key is None:
+            self._serialized_public_key = self.public_key.public_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+        return self._serialized_public_key
 
     def load_public_key(self, public_key_bytes: bytes):
         self.public_key = serialization.load_pem_public_key(
             public_key_bytes, backend=default_backend()
         )
+        self._serialized_public_key = None
 
-    def encrypt(self, message: str) -> bytes:
+    def encrypt(self, message) -> bytes:
+        if isinstance(message, str):
+            message = message.encode('utf-8')
         return self.public_key.encrypt(
-            message.encode('utf-8'),
+            message,
             padding.OAEP(
                 mgf=padding.MGF1(algorithm=hashes.SHA256()),
                 algorithm=hashes.SHA256(),
@@ -37,6 +118,9 @@ class EncryptionManager:
         )
 
     def decrypt(self, ciphertext: bytes) -> str:
+        return self.decrypt_bytes(ciphertext).decode('utf-8')
+
+    def decrypt_bytes(self, ciphertext: bytes) -> bytes:
         if self.private_key is None:
             raise ValueError("Private key not loaded (only server has private key)")
         plaintext = self.private_key.decrypt(
@@ -47,4 +131,52 @@ class EncryptionManager:
                 label=None
             )
         )
-        return plaintext.decode('utf-8')
\ No newline at end of file
+        return plaintext
+
+
+class SessionCipher:
+    """AES-GCM framing for everything sent after the RSA key exchange.
+
+    seal() returns a whole frame: a 4-byte length followed by ciphertext and
+    tag. Nonces are never sent: each side counts the frames it sends, and
+    the direction is part of the nonce so both sides can share one key.
+    """
+    CLIENT_TO_SERVER = b"c2s\0"
+    SERVER_TO_CLIENT = b"s2c\0"
+
+    def __init__(self, key: bytes, is_server: bool):
+        if len(key) != SESSION_KEY_SIZE:
+            raise ValueError("Session key must be 32 bytes")
+        self.aead = AESGCM(key)
+        self.send_prefix = self.SERVER_TO_CLIENT if is_server else self.CLIENT_TO_SERVER
+        self.recv_prefix = self.CLIENT_TO_SERVER if is_server else self.SERVER_TO_CLIENT
+        self.send_counter = 0
+        self.recv_counter = 0
+        self.send_lock = threading.Lock()  # the counter must match the order frames hit the wire
+
+    @staticmethod
+    def generate_key() -> bytes:
+        return AESGCM.generate_key(bit_length=SESSION_KEY_SIZE * 8)
+
+    def seal(self, plaintext: bytes) -> bytes:
+        with self.send_lock:
+            nonce = self.send_prefix + self.send_counter.to_bytes(8, 'big')
+            self.send_counter += 1
+            ciphertext = self.aead.encrypt(nonce, plaintext, None)
+        return len(ciphertext).to_bytes(4, 'big') + ciphertext
+
+    def open(self, ciphertext: bytes) -> bytes:
+        """Decrypt the next frame's payload; raises InvalidTag if it was tampered with."""
+        nonce = self.recv_prefix + self.recv_counter.to_bytes(8, 'big')
+        self.recv_counter += 1
+        return self.aead.decrypt(nonce, bytes(ciphertext), None)
+
+
+def derive_resume_key(secret: bytes, token: bytes, nonce: bytes) -> bytes:
+    """Session key for a resumed connection: both sides know the secret, the client picks the nonce."""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=SESSION_KEY_SIZE,
+        salt=nonce,
+        info=b"bombparty resume" + token,
+    ).derive(secret)
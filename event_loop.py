@@ -0,0 +1,244 @@
+import logging
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from framing import MAX_FRAME, SEAL_OVERHEAD
+
+log = logging.getLogger("bombparty.loop")
+
+
+class Connection:
+    """One client socket owned by the event loop."""
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.inbuf = bytearray()  # handshake bytes received but not yet parsed
+        self.framer = None  # MessageFramer for the line protocol once the handshake is done
+        self.encryption_manager = None  # keys used for this connection's handshake
+        self.session = None  # SessionCipher; once set, outgoing data is sealed into frames
+        self.deframer = None
+        self.outbox = deque()  # (droppable, bytes) messages queued by game threads
+        self.outbuf = bytearray()  # bytes taken from the outbox that the socket hasn't accepted yet
+        self.lock = threading.Lock()  # outbox is filled from game threads
+        self.dropped = 0  # droppable messages thrown away because the queue was full
+        self.closing = False  # close once outbuf is flushed
+        self.closed = False
+        self.player = None
+        self.resume_token = None  # session token offered by a reconnecting client
+        self.handshake_done = False
+        self.events = selectors.EVENT_READ
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def queue_depth(self):
+        return len(self.outbox) + (1 if self.outbuf else 0)
+
+
+class EventLoopServer:
+    """Multiplex every client connection on a single selectors loop.
+
+    The handler gets connection_made(conn), data_received(conn, data) and
+    connection_lost(conn) on the loop thread. `data` is a memoryview into a
+    receive buffer shared by all connections, only valid during the call.
+    send() and close() may be called from any thread; the actual socket
+    writes always happen here.
+
+    Each connection's outbound queue holds at most max_queue messages. When
+    a slow client fills it, overflow_policy decides: "drop_input" throws
+    away the queued droppable messages (live typing) and only disconnects
+    if that isn't enough, "disconnect" closes the connection right away.
+    """
+
+    def __init__(self, handler, recv_size=4096, max_queue=256, overflow_policy="drop_input",
+                 write_chunk=MAX_FRAME - SEAL_OVERHEAD):
+        if overflow_policy not in ("drop_input", "disconnect"):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.handler = handler
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.write_chunk = write_chunk
+        self.recv_buffer = bytearray(recv_size)
+        self.recv_view = memoryview(self.recv_buffer)
+        self.selector = selectors.DefaultSelector()
+        self.connections = set()
+        self.pending = set()  # connections other threads queued output or a close for
+        self.pending_lock = threading.Lock()
+        self.running = False
+        self.periodic = []  # [interval, callback, next run] run on the loop thread
+        # totals for the metrics endpoint
+        self.send_failures = 0  # socket errors while writing
+        self.overflow_disconnects = 0
+        self.dropped_messages = 0
+        # writing a byte here wakes the loop up from select()
+        self.wake_r, self.wake_w = socket.socketpair()
+        self.wake_r.setblocking(False)
+        self.wake_w.setblocking(False)
+        self.selector.register(self.wake_r, selectors.EVENT_READ, "wake")
+
+    def send(self, conn, data, droppable=False):
+        """Queue data for conn; droppable data may be discarded if the client falls behind."""
+        if conn.closed or conn.closing:
+            return
+        with conn.lock:
+            if len(conn.outbox) >= self.max_queue and not self._make_room(conn):
+                conn.outbox.clear()
+                conn.outbuf.clear()  # don't wait for a stuck client to drain before closing
+                conn.closing = True
+                self.overflow_disconnects += 1
+                log.warning("send queue of %s overflowed, disconnecting", conn.address)
+            else:
+                conn.outbox.append((droppable, data))
+        self._schedule(conn)
+
+    def _make_room(self, conn):
+        # called with conn.lock held
+        if self.overflow_policy != "drop_input":
+            return False
+        kept = deque(item for item in conn.outbox if not item[0])
+        conn.dropped += len(conn.outbox) - len(kept)
+        self.dropped_messages += len(conn.outbox) - len(kept)
+        conn.outbox = kept
+        return len(conn.outbox) < self.max_queue
+
+    def queue_depths(self):
+        """Outbound queue depth of every open connection."""
+        return {conn: conn.queue_depth() for conn in list(self.connections)}
+
+    def close(self, conn):
+        conn.closing = True
+        self._schedule(conn)
+
+    def _schedule(self, conn):
+        with self.pending_lock:
+            self.pending.add(conn)
+        self._wake()
+
+    def call_every(self, interval, callback):
+        """Run callback on the loop thread every `interval` seconds."""
+        self.periodic.append([interval, callback, time.monotonic() + interval])
+
+    def _run_periodic(self):
+        now = time.monotonic()
+        for task in self.periodic:
+            if task[2] <= now:
+                task[1]()
+                task[2] = max(task[2] + task[0], now)  # don't try to catch up after a stall
+        if not self.periodic:
+            return None
+        return max(0.0, min(task[2] for task in self.periodic) - time.monotonic())
+
+    def serve_forever(self, listener):
+        listener.setblocking(False)
+        self.selector.register(listener, selectors.EVENT_READ, "accept")
+        self.running = True
+        while self.running:
+            timeout = self._run_periodic()
+            for key, mask in self.selector.select(timeout):
+                if key.data == "accept":
+                    self._accept(listener)
+                elif key.data == "wake":
+                    self._drain_wake()
+                else:
+                    conn = key.data
+                    if mask & selectors.EVENT_READ:
+                        self._read(conn)
+                    if mask & selectors.EVENT_WRITE and not conn.closed:
+                        self._write(conn)
+        self.selector.unregister(listener)
+
+    def stop(self):
+        self.running = False
+        self._wake()
+
+    def _wake(self):
+        try:
+            self.wake_w.send(b"\0")
+        except OSError:
+            pass  # the wake socket is already full, so the loop is going to wake up anyway
+
+    def _accept(self, listener):
+        while True:
+            try:
+                sock, address = listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # keystrokes are tiny
+            conn = Connection(sock, address)
+            self.connections.add(conn)
+            self.selector.register(sock, selectors.EVENT_READ, conn)
+            self.handler.connection_made(conn)
+
+    def _drain_wake(self):
+        try:
+            while self.wake_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        with self.pending_lock:
+            pending, self.pending = self.pending, set()
+        for conn in pending:
+            if not conn.closed:
+                self._write(conn)
+
+    def _read(self, conn):
+        try:
+            size = conn.sock.recv_into(self.recv_buffer)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            size = 0
+        if not size:
+            self._close_now(conn)
+            return
+        self.handler.data_received(conn, self.recv_view[:size])
+
+    def _write(self, conn):
+        with conn.lock:
+            # move queued messages into one write buffer of at most write_chunk bytes, so the
+            # sealed frame stays within the peer's MAX_FRAME (a single larger message goes alone)
+            if conn.outbox and len(conn.outbuf) < self.write_chunk:
+                batch = bytearray(conn.outbox.popleft()[1])
+                while conn.outbox and len(batch) + len(conn.outbox[0][1]) <= self.write_chunk:
+                    batch += conn.outbox.popleft()[1]
+                # sealing here, not in send(), keeps frame counters right when messages are dropped,
+                # and one frame per batch costs one AEAD operation instead of one per message
+                conn.outbuf += conn.session.seal(bytes(batch)) if conn.session else batch
+            if conn.outbuf:
+                try:
+                    sent = conn.sock.send(conn.outbuf)
+                except (BlockingIOError, InterruptedError):
+                    sent = 0
+                except OSError:
+                    self.send_failures += 1
+                    conn.outbuf.clear()
+                    conn.outbox.clear()
+                    conn.closing = True
+                    sent = 0
+                del conn.outbuf[:sent]
+            has_output = bool(conn.outbuf or conn.outbox)
+
+        if not has_output and conn.closing:
+            self._close_now(conn)
+            return
+        # only ask for write readiness while there is something left to write
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if has_output else 0)
+        if events != conn.events:
+            conn.events = events
+            self.selector.modify(conn.sock, events, conn)
+
+    def _close_now(self, conn):
+        if conn.closed:
+            return
+        conn.closed = True
+        self.connections.discard(conn)
+        try:
+            self.selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        conn.sock.close()
+        self.handler.connection_lost(conn)
@@ -0,0 +1,103 @@
+import codecs
+
+MAX_FRAME = 65536  # largest encrypted frame payload a peer accepts
+SEAL_OVERHEAD = 16  # AES-GCM tag added to every sealed frame
+
+
+class FrameTooLong(Exception):
+    pass
+
+
+class MessageFramer:
+    """Split a byte stream into newline-delimited text messages.
+
+    Bytes are decoded incrementally, so a Hebrew letter split across two
+    recv() calls is completed by the next one, and text after the last
+    newline is carried over until the rest of its message arrives. Every
+    complete message is returned exactly once.
+    """
+
+    def __init__(self, max_message=4096):
+        self.max_message = max_message  # characters allowed without a newline
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.pending = ""
+
+    def feed(self, data):
+        """Feed received bytes (bytes, bytearray or memoryview); return the complete messages."""
+        text = self.decoder.decode(data)
+        if "\n" not in text:
+            self.pending += text
+            self._check_pending()
+            return []
+        messages = (self.pending + text).split("\n")
+        self.pending = messages.pop()  # the unfinished tail, "" if data ended with a newline
+        self._check_pending()
+        return [msg for msg in messages if msg]
+
+    def _check_pending(self):
+        if len(self.pending) > self.max_message:
+            self.pending = ""
+            raise FrameTooLong(f"message longer than {self.max_message} characters")
+
+
+class FrameDeframer:
+    """Split a byte stream into length-prefixed frames (4-byte big-endian length)."""
+
+    def __init__(self, max_frame=MAX_FRAME):
+        self.max_frame = max_frame
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Feed received bytes; return the payloads of the complete frames."""
+        self.buffer += data
+        frames = []
+        view = memoryview(self.buffer)
+        offset = 0
+        while len(view) - offset >= 4:
+            size = int.from_bytes(view[offset:offset + 4], 'big')
+            if size > self.max_frame:
+                view.release()
+                raise FrameTooLong(f"frame of {size} bytes")
+            if len(view) - offset - 4 < size:
+                break
+            frames.append(bytes(view[offset + 4:offset + 4 + size]))
+            offset += 4 + size
+        view.release()
+        del self.buffer[:offset]
+        return frames
+
+
+class SocketReceiver:
+    """Read messages from a blocking socket through a MessageFramer.
+
+    recv_into() fills one reusable buffer and the framer decodes straight
+    from a memoryview of it, so no intermediate bytes objects are made.
+    With a session, the stream is AES-GCM frames that are opened first.
+    """
+
+    def __init__(self, sock, session=None, buffer_size=4096, max_message=4096):
+        self.sock = sock
+        self.session = session
+        self.deframer = FrameDeframer() if session is not None else None
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.framer = MessageFramer(max_message)
+        self.messages = []
+        self.next_index = 0
+
+    def receive(self):
+        """Return the next complete message, blocking until one arrives."""
+        while self.next_index >= len(self.messages):
+            size = self.sock.recv_into(self.buffer)
+            if size == 0:
+                raise ConnectionError("Connection closed by peer")
+            if self.session is None:
+                self.messages = self.framer.feed(self.view[:size])
+            else:
+                self.messages = []
+                for frame in self.deframer.feed(self.view[:size]):
+                    self.messages += self.framer.feed(self.session.open(frame))
+            self.next_index = 0
+        message = self.messages[self.next_index]
+        self.next_index += 1
+        return message
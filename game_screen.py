@@ -6,14 +6,8 @@ class Ui_GameWindow(object):
         MainWindow.setWindowTitle("BombParty Game")
         MainWindow.setMinimumSize(600, 700)  # Optional: enforce minimum size
 
-        # ✨ Main style sheet with background image
+        # ✨ Main style sheet (the background image is painted by BackgroundMixin)
         MainWindow.setStyleSheet("""
-            QMainWindow {
-                background-image: url(images/Designer.jpg);
-                background-repeat: no-repeat;
-                background-position: center;
-                background-size: cover;
-            }
             QLabel {
                 color: white;
                 font-family: 'Segoe UI', sans-serif;
@@ -0,0 +1,233 @@
+"""Headless load generator: many simulated players in one process.
+
+Each bot does the normal Client handshake, joins a room, and plays by
+typing words from a local word list. It records end-to-end latencies:
+
+  TURN_START    accepted ENTER of the previous player -> next TURN_START
+  UPDATE_INPUT  a bot sends a keystroke -> another bot sees the text (full or delta)
+  VALID_WORD    ENTER sent -> VALID_WORD received
+
+    python load_bot.py --bots 200 --room-size 4 --cps 12 --duration 60
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from client_connection import Client
+from ngram_index import NgramIndex
+from server import GameUtils
+import text_delta
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind, seconds):
+        with self.lock:
+            self.samples.setdefault(kind, []).append(seconds)
+
+    @staticmethod
+    def percentile(sorted_values, p):
+        index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+        return sorted_values[index]
+
+    def report(self, percentiles=(50, 90, 99)):
+        with self.lock:
+            samples = {kind: sorted(values) for kind, values in self.samples.items()}
+        report = {}
+        for kind, values in samples.items():
+            row = {"count": len(values), "max_ms": values[-1] * 1000}
+            for p in percentiles:
+                row[f"p{p}_ms"] = self.percentile(values, p) * 1000
+            report[kind] = row
+        return report
+
+
+class RoomState:
+    """What the bots of one room share, so cross-client latencies can be measured."""
+
+    def __init__(self, size):
+        self.size = size
+        self.used_words = set()
+        self.last_enter_at = None  # set before the server can answer, so no cross-socket race
+        self.typed_at = {}  # text -> when it was sent
+        self.lock = threading.Lock()
+
+
+class Bot:
+    def __init__(self, name, host, port, room_name, room, words, recorder, cps=10.0, mistake_rate=0.0):
+        self.name = name
+        self.client = Client(host, port)
+        self.room_name = room_name
+        self.room = room
+        self.words = words  # LocalWords
+        self.recorder = recorder
+        self.cps = cps  # characters typed per second
+        self.mistake_rate = mistake_rate  # chance of submitting a word that doesn't solve the challenge
+        self.players = []
+        self.is_host = False
+        self.started = False
+        self.enter_sent_at = None
+        self.running = True
+        self.turns = 0
+        self.shown_text = ""  # the current player's text, rebuilt from UPDATE_INPUT/UPDATE_DELTA
+
+    def start(self):
+        self.client.connect_to_server()
+        self.client.send_encrypted_message(self.name)
+        self.client.join_room(self.room_name)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.client.close_connection()
+
+    def run(self):
+        try:
+            while self.running:
+                message = self.client.recv_message()
+                command, _, value = message.partition("|")
+                self.handle(command, value, time.perf_counter())
+        except (ConnectionError, OSError):
+            pass
+
+    def handle(self, command, value, now):
+        if command == "TURN_START":
+            with self.room.lock:
+                if self.room.last_enter_at is not None:
+                    self.recorder.record("TURN_START", now - self.room.last_enter_at)
+                    self.room.last_enter_at = None
+            self.turns += 1
+            threading.Thread(target=self.play_turn, args=(value,), daemon=True).start()
+        elif command in ("UPDATE_INPUT", "UPDATE_DELTA"):
+            if command == "UPDATE_INPUT":
+                self.shown_text = value
+            else:
+                try:
+                    self.shown_text = text_delta.apply(self.shown_text, *text_delta.decode(value))
+                except ValueError:
+                    return  # wait for the next checkpoint
+            with self.room.lock:
+                sent_at = self.room.typed_at.get(self.shown_text)
+            if sent_at is not None:
+                self.recorder.record("UPDATE_INPUT", now - sent_at)
+        elif command in ("VALID_WORD", "TIME_UP"):
+            if command == "VALID_WORD" and self.enter_sent_at is not None:
+                self.recorder.record("VALID_WORD", now - self.enter_sent_at)
+            self.enter_sent_at = None
+        elif command in ("INVALID_WORD", "USED_WORD"):
+            self.enter_sent_at = None
+            with self.room.lock:
+                self.room.last_enter_at = None  # the turn goes on, nothing to time
+        elif command == "ADMIN" and value.startswith("YOU_ARE_THE_HOST"):
+            self.is_host = True
+            self.maybe_start()
+        elif command == "PLAYER_LIST":
+            self.players = value.split(",")
+            self.maybe_start()
+        elif command == "GAME_OVER":
+            self.running = False
+
+    def maybe_start(self):
+        if self.is_host and not self.started and len(self.players) >= self.room.size:
+            self.started = True
+            self.client.send_message("BUTTON|START_GAME\n")
+
+    def play_turn(self, challenge):
+        with self.room.lock:
+            word = self.words.answer(challenge, self.room.used_words)
+            if word is not None:
+                self.room.used_words.add(word)
+        if word is None or random.random() < self.mistake_rate:
+            word = self.words.random_word()
+        try:
+            for i in range(1, len(word) + 1):
+                time.sleep(1.0 / self.cps)
+                text = word[:i]
+                with self.room.lock:
+                    self.room.typed_at[text] = time.perf_counter()
+                self.client.send_message(f"INPUT_DELTA|{i - 1}:0:{word[i - 1]}\n")
+            self.enter_sent_at = time.perf_counter()
+            with self.room.lock:
+                self.room.last_enter_at = self.enter_sent_at
+            self.client.send_message("INPUT_CLIENT|ENTER\n")
+        except OSError:
+            self.running = False
+
+
+class LocalWords:
+    """The bots' own word list, indexed so answering a challenge is a lookup."""
+
+    def __init__(self, file_path):
+        with open(file_path, encoding='utf-8') as f:
+            self.raw_words = [line.strip() for line in f if line.strip()]
+        self.by_normalized = {}
+        for word in self.raw_words:
+            self.by_normalized.setdefault(GameUtils.normalize(word), []).append(word)
+        self.index = NgramIndex(self.by_normalized, GameUtils.normalize)
+
+    def answer(self, challenge, used):
+        for normalized in self.index.words_containing(challenge):
+            for word in self.by_normalized[normalized]:
+                # the server checks the challenge against the word as typed
+                if challenge in word and word not in used:
+                    return word
+        return None
+
+    def random_word(self):
+        return random.choice(self.raw_words)
+
+
+def run_load(host, port, bots, room_size, cps, duration, word_list, mistake_rate=0.0, connect_rate=50.0):
+    recorder = LatencyRecorder()
+    words = LocalWords(word_list)
+    players = []
+    rooms = {}
+    run_id = random.randrange(1 << 16)
+    for i in range(bots):
+        room_name = f"load-{run_id}-{i // room_size}"
+        room = rooms.setdefault(room_name, RoomState(min(room_size, bots - (i // room_size) * room_size)))
+        bot = Bot(f"bot{i}", host, port, room_name, room, words, recorder, cps, mistake_rate)
+        bot.start()
+        players.append(bot)
+        time.sleep(1.0 / connect_rate)  # don't turn the test into a connect storm
+
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline and any(bot.running for bot in players):
+        time.sleep(0.5)
+    for bot in players:
+        bot.stop()
+    return recorder.report(), sum(bot.turns for bot in players)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless load generator for the BombParty server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=65432)
+    parser.add_argument("--bots", type=int, default=100)
+    parser.add_argument("--room-size", type=int, default=4)
+    parser.add_argument("--cps", type=float, default=10.0, help="characters typed per second per bot")
+    parser.add_argument("--mistake-rate", type=float, default=0.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--words", default="word_list.txt")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report, turns = run_load(args.host, args.port, args.bots, args.room_size, args.cps, args.duration,
+                             args.words, args.mistake_rate)
+    print(f"{args.bots} bots, {turns} turns")
+    print(f"{'event':<14}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for kind, row in sorted(report.items()):
+        print(f"{kind:<14}{row['count']:>8}{row['p50_ms']:>10.2f}{row['p90_ms']:>10.2f}"
+              f"{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"bots": args.bots, "turns": turns, "latency": report}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
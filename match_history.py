@@ -0,0 +1,163 @@
+import logging
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    room TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    players TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS turn_events (
+    id INTEGER PRIMARY KEY,
+    game_id INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    at REAL NOT NULL,
+    player TEXT NOT NULL,
+    sequence TEXT,
+    event TEXT NOT NULL,
+    word TEXT,
+    elapsed REAL,
+    difficulty REAL
+);
+CREATE INDEX IF NOT EXISTS turn_events_player ON turn_events (player);
+CREATE INDEX IF NOT EXISTS turn_events_sequence ON turn_events (sequence);
+CREATE INDEX IF NOT EXISTS turn_events_word ON turn_events (word);
+CREATE INDEX IF NOT EXISTS turn_events_game ON turn_events (game_id, turn);
+"""
+
+# turn_events.event values
+TURN_START = "start"
+VALID = "valid"
+INVALID = "invalid"
+USED = "used"
+TIME_UP = "time_up"
+GAME_OVER = "game_over"  # player is the winner
+
+log = logging.getLogger("bombparty.history")
+
+
+class MatchHistory:
+    """Append-only record of every game and turn event, in SQLite (WAL).
+
+    record() only puts a row on a queue; a writer thread inserts queued rows
+    in batches of up to batch_size, one transaction per batch, at least every
+    flush_interval seconds. If the writer falls behind by max_pending rows,
+    new rows are dropped (and counted) rather than slowing a turn down; a
+    batch SQLite refuses is logged and counted in write_errors and dropped.
+    """
+
+    def __init__(self, db_path='history.db', batch_size=500, flush_interval=0.5, max_pending=100000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.written = 0
+        self.write_errors = 0
+
+        db = self._connect()
+        db.executescript(SCHEMA)
+        db.close()
+        self.read_lock = threading.Lock()
+        self.reader = self._connect()
+        self.thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # with WAL a crash can lose the last batch, never corrupt
+        return db
+
+    @staticmethod
+    def new_game_id():
+        # made up here so nobody waits for an insert: start time in ms plus 20 random bits,
+        # unique across server processes sharing the file and still sorted by start
+        return time.time_ns() // 1_000_000 << 20 | secrets.randbits(20)
+
+    def start_game(self, room, players):
+        game_id = self.new_game_id()
+        self._put(("games", (game_id, room, time.time(), ",".join(players))))
+        return game_id
+
+    def record(self, game_id, turn, player, sequence, event, word=None, elapsed=None, difficulty=None):
+        self._put(("turn_events", (game_id, turn, time.time(), player, sequence, event, word, elapsed, difficulty)))
+
+    def _put(self, row):
+        try:
+            self.pending.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            stop = None in batch
+            rows = [row for row in batch if row is not None]
+            try:
+                self._write(db, rows)
+            except sqlite3.Error as e:
+                self.write_errors += 1
+                self.dropped += len(rows)
+                log.error("could not write %d history rows: %s", len(rows), e)
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+            if stop:
+                db.close()
+                return
+
+    def _write(self, db, rows):
+        games = [values for table, values in rows if table == "games"]
+        events = [values for table, values in rows if table == "turn_events"]
+        with db:  # one transaction per batch
+            if games:
+                db.executemany("INSERT INTO games (id, room, started_at, players) VALUES (?, ?, ?, ?)", games)
+            if events:
+                db.executemany("INSERT INTO turn_events (game_id, turn, at, player, sequence, event, word, "
+                               "elapsed, difficulty) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", events)
+        self.written += len(rows)
+
+    def flush(self):
+        """Block until every row recorded so far is written."""
+        self.pending.join()
+
+    def close(self, timeout=5.0):
+        try:
+            self.pending.put_nowait(None)
+        except queue.Full:
+            log.warning("closing with %d history rows still queued", self.pending.qsize())
+        else:
+            self.thread.join(timeout)
+        self.reader.close()
+
+    # --- queries (served by the indexes) ---
+    def _query(self, column, value, limit):
+        with self.read_lock:
+            return self.reader.execute(
+                "SELECT game_id, turn, at, player, sequence, event, word, elapsed, difficulty FROM turn_events "
+                f"WHERE {column} = ? ORDER BY id DESC LIMIT ?", (value, limit)).fetchall()
+
+    def events_for_player(self, player, limit=1000):
+        return self._query("player", player, limit)
+
+    def events_for_sequence(self, sequence, limit=1000):
+        return self._query("sequence", sequence, limit)
+
+    def events_for_word(self, word, limit=1000):
+        return self._query("word", word, limit)
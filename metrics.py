@@ -0,0 +1,209 @@
+"""Counters, gauges and histograms in the Prometheus text format.
+
+    registry = MetricsRegistry()
+    registry.counter("messages_in_total", "Messages received", ("type",)).inc(type="TURN_START")
+    registry.histogram("verify_seconds", "Word verification latency").observe(0.012)
+    MetricsHTTPServer(registry, port=9100).start()   # GET /metrics
+"""
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+
+    def _key(self, label_values):
+        return tuple(label_values.get(name, "") for name in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _Value(_Metric):
+    """A number per label set, or values read from a callback at scrape time.
+
+    A callback returns one number, or with labels a {label values tuple: number} dict.
+    """
+
+    def __init__(self, name, help_text, labels=(), callback=None):
+        super().__init__(name, help_text, labels)
+        self.values = {}
+        self.callback = callback  # for values another object already keeps count of
+
+    def render(self):
+        if self.callback is not None and not self.labels:
+            return self.header() + [f"{self.name} {self.callback()}"]
+        if self.callback is not None:
+            items = sorted(self.callback().items())
+        else:
+            with self.lock:
+                items = sorted(self.values.items())
+        return self.header() + [f"{self.name}{_label_text(self.labels, key)} {value}" for key, value in items]
+
+
+class Counter(_Value):
+    kind = "counter"
+
+    def inc(self, amount=1, **label_values):
+        key = self._key(label_values)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Value):
+    kind = "gauge"
+
+    def set(self, value, **label_values):
+        with self.lock:
+            self.values[self._key(label_values)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, **label_values):
+        key = self._key(label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        with self.lock:
+            items = sorted((key, list(series)) for key, series in self.series.items())
+        lines = self.header()
+        names = self.labels + ("le",)
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_text(names, key + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_text(names, key + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, prefix="bombparty_"):
+        self.prefix = prefix
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, *args, **kwargs):
+        name = self.prefix + name
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help_text="", labels=(), callback=None):
+        return self._get(Counter, name, help_text, labels, callback)
+
+    def gauge(self, name, help_text="", labels=(), callback=None):
+        return self._get(Gauge, name, help_text, labels, callback)
+
+    def histogram(self, name, help_text="", labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets)
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsHTTPServer:
+    """Serve GET /metrics from a background thread."""
+
+    def __init__(self, registry, host="127.0.0.1", port=9100):
+        self.httpd = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.registry = registry
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class SnapshotWriter:
+    """Write the registry to a file every `interval` seconds (for scraping without HTTP)."""
+
+    def __init__(self, registry, path, interval=10.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(f"# snapshot at {time.time():.3f}\n")
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.path)
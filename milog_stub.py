@@ -0,0 +1,70 @@
+"""Local stand-in for milog.co.il, for tests and benchmarks.
+
+    stub = StubMilogServer(words={'שלום'}, latency=0.5, error_rate=0.2)
+    stub.start()
+    validator = MilogValidator(url=stub.url)
+    ...
+    stub.stop()
+"""
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        stub = self.server.stub
+        stub.requests += 1
+        if stub.latency:
+            time.sleep(stub.latency)
+        if random.random() < stub.error_rate:
+            self.send_error(stub.error_status)
+            return
+
+        word = unquote(self.path.lstrip('/'))
+        if word in stub.words:
+            # same markup milog uses for a word with results
+            text = f"התקבלו {stub.results} תוצאות"
+        else:
+            text = "לא נמצאו תוצאות"
+        body = (f"<html><body><div class=\"sr_below_text\">{text}</div></body></html>").encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep test output quiet
+
+
+class StubMilogServer:
+    """HTTP server answering like milog.co.il, with injectable latency and errors."""
+
+    def __init__(self, words=(), latency=0.0, error_rate=0.0, error_status=500, results=5, port=0):
+        self.words = set(words)
+        self.latency = latency  # seconds to sleep before answering
+        self.error_rate = error_rate  # fraction of requests answered with error_status
+        self.error_status = error_status
+        self.results = results
+        self.requests = 0
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
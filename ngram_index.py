@@ -0,0 +1,158 @@
+import logging
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+log = logging.getLogger("bombparty.index")
+
+MAGIC = b"BPNG"
+VERSION = 1
+# magic, version, sha256 of the word list, number of words, number of grams, sizes of the two text blobs
+HEADER = struct.Struct("<4sH32sIIII")
+
+
+class NgramIndex:
+    """Inverted index from every 2- and 3-letter sequence to the words that contain it.
+
+    Words are stored once in a sorted list and posting lists are sorted
+    arrays of word IDs, so "which words contain X" never scans the lexicon.
+    load_or_build() keeps the posting lists on disk next to the word list,
+    like SequenceIndex, so a restart doesn't recompute them.
+    """
+
+    def __init__(self, words, normalize, digest=None, postings=None):
+        self.normalize = normalize
+        self.digest = digest  # of the word list the index was built from, if it came from a file
+        if postings is not None:
+            self.words = words  # already sorted, unique and normalized
+            self.postings = postings
+            return
+        self.words = sorted(set(words))  # normalized words; a word's ID is its position here
+
+        postings = {}
+        for word_id, word in enumerate(self.words):
+            grams = {word[i:i + 2] for i in range(len(word) - 1)}
+            grams.update(word[i:i + 3] for i in range(len(word) - 2))
+            for gram in grams:
+                postings.setdefault(gram, []).append(word_id)
+        # IDs were appended in increasing order, so every posting list is already sorted
+        self.postings = {gram: array('I', ids) for gram, ids in postings.items()}
+
+    def save(self, index_path):
+        grams = list(self.postings)
+        offsets = array('I', [0])
+        ids = array('I')
+        for gram in grams:
+            ids.extend(self.postings[gram])
+            offsets.append(len(ids))
+        words_blob = "\n".join(self.words).encode('utf-8')
+        grams_blob = "\n".join(grams).encode('utf-8')
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.digest, len(self.words), len(grams),
+                                len(words_blob), len(grams_blob)))
+            f.write(offsets.tobytes())
+            f.write(ids.tobytes())
+            f.write(words_blob)
+            f.write(grams_blob)
+        os.replace(tmp_path, index_path)  # never leave a half-written index behind
+
+    @classmethod
+    def load(cls, index_path, normalize):
+        """Load a saved index, or return None if the file is missing or unreadable."""
+        try:
+            with open(index_path, 'rb') as f:
+                data = f.read()
+            magic, version, digest, word_count, gram_count, words_len, grams_len = HEADER.unpack_from(data)
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC or version != VERSION:
+            return None
+
+        offset = HEADER.size
+        offsets = array('I')
+        offsets.frombytes(data[offset:offset + (gram_count + 1) * offsets.itemsize])
+        offset += (gram_count + 1) * offsets.itemsize
+        if len(offsets) != gram_count + 1:
+            return None
+        ids = array('I')
+        ids.frombytes(data[offset:offset + offsets[-1] * ids.itemsize])
+        offset += offsets[-1] * ids.itemsize
+        words = data[offset:offset + words_len].decode('utf-8').split("\n") if word_count else []
+        offset += words_len
+        grams = data[offset:offset + grams_len].decode('utf-8').split("\n") if gram_count else []
+        if len(ids) != offsets[-1] or len(words) != word_count or len(grams) != gram_count:
+            return None
+        postings = {gram: ids[offsets[i]:offsets[i + 1]] for i, gram in enumerate(grams)}
+        return cls(words, normalize, digest, postings)
+
+    @classmethod
+    def load_or_build(cls, word_list_path, normalize, digest, index_path=None):
+        """Load the index saved next to the word list, rebuilding it if the word list changed.
+
+        digest is the word list's sha256, as SequenceIndex already computed it.
+        """
+        if index_path is None:
+            index_path = os.path.splitext(word_list_path)[0] + ".ngidx"
+        index = cls.load(index_path, normalize)
+        if index is not None and index.digest == digest:
+            return index
+
+        with open(word_list_path, encoding='utf-8') as f:
+            words = [normalize(line.strip()) for line in f if line.strip()]
+        index = cls(words, normalize, digest)
+        try:
+            index.save(index_path)
+        except OSError as e:
+            log.warning("could not save n-gram index to %s: %s", index_path, e)
+        return index
+
+    def posting(self, sequence):
+        """Word IDs of the words containing sequence."""
+        sequence = self.normalize(sequence)
+        if len(sequence) <= 3:
+            return self.postings.get(sequence, array('I'))
+
+        # longer sequences: intersect the trigram lists, then confirm the whole substring
+        lists = sorted((self.postings.get(sequence[i:i + 3], array('I')) for i in range(len(sequence) - 2)), key=len)
+        candidates = set(lists[0])
+        for ids in lists[1:]:
+            candidates.intersection_update(ids)
+        return array('I', sorted(i for i in candidates if sequence in self.words[i]))
+
+    def word_id(self, word):
+        """ID of a word (in any form), or None if it isn't in the index."""
+        word = self.normalize(word)
+        i = bisect_left(self.words, word)  # words are sorted, so no separate word -> ID table
+        return i if i < len(self.words) and self.words[i] == word else None
+
+    def word_ids(self, words):
+        ids = set()
+        for word in words:
+            word_id = self.word_id(word)
+            if word_id is not None:
+                ids.add(word_id)
+        return ids
+
+    def count(self, sequence, exclude=()):
+        ids = self.posting(sequence)
+        if not exclude:
+            return len(ids)
+        excluded = self.word_ids(exclude)
+        return sum(1 for i in ids if i not in excluded)
+
+    def words_containing(self, sequence, exclude=(), limit=None):
+        """Yield the words that contain sequence, skipping words in exclude."""
+        excluded = self.word_ids(exclude)
+        found = 0
+        for i in self.posting(sequence):
+            if i in excluded:
+                continue
+            yield self.words[i]
+            found += 1
+            if limit is not None and found >= limit:
+                return
+
+    def is_solvable(self, sequence, exclude=()):
+        return next(self.words_containing(sequence, exclude), None) is not None
@@ -0,0 +1,90 @@
+import difflib
+from PyQt6 import QtCore, QtGui, QtWidgets
+from PyQt6.QtCore import Qt
+
+HeartsRole = Qt.ItemDataRole.UserRole + 1
+
+
+class PlayerListModel(QtCore.QAbstractListModel):
+    """Player names and hearts; a new PLAYER_LIST only touches the rows that changed."""
+
+    def __init__(self, default_lives=3, parent=None):
+        super().__init__(parent)
+        self.names = []
+        self.rows = {}  # name -> row, rebuilt when rows move
+        self.hearts = {}
+        self.default_lives = default_lives
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.names[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return name
+        if role == HeartsRole:
+            return self.hearts.get(name, self.default_lives)
+        return None
+
+    def set_players(self, names):
+        # apply the edit script back to front so earlier indices stay valid
+        opcodes = difflib.SequenceMatcher(None, self.names, names, autojunk=False).get_opcodes()
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag in ("delete", "replace"):
+                self.beginRemoveRows(QtCore.QModelIndex(), i1, i2 - 1)
+                del self.names[i1:i2]
+                self.endRemoveRows()
+            if tag in ("insert", "replace"):
+                self.beginInsertRows(QtCore.QModelIndex(), i1, i1 + j2 - j1 - 1)
+                self.names[i1:i1] = names[j1:j2]
+                self.endInsertRows()
+        self.rows = {name: row for row, name in enumerate(self.names)}
+
+    def set_hearts(self, name, hearts):
+        if self.hearts.get(name) == hearts:
+            return
+        self.hearts[name] = hearts
+        row = self.rows.get(name)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [HeartsRole])
+
+
+class PlayerItemDelegate(QtWidgets.QStyledItemDelegate):
+    """Paint a row as a rounded dark card with the name and hearts, without a widget per row."""
+    ROW_HEIGHT = 46
+    MARGIN = 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.background = QtGui.QColor(0, 0, 0, 102)
+        self.name_font = QtGui.QFont("Segoe UI")
+        self.name_font.setPixelSize(18)
+        self.name_font.setWeight(QtGui.QFont.Weight.DemiBold)
+        self.hearts_font = QtGui.QFont()
+        self.hearts_font.setPixelSize(18)
+        self.name_metrics = QtGui.QFontMetrics(self.name_font)
+
+    def sizeHint(self, option, index):
+        return QtCore.QSize(option.rect.width(), self.ROW_HEIGHT + 2 * self.MARGIN)
+
+    def paint(self, painter, option, index):
+        name = index.data(Qt.ItemDataRole.DisplayRole)
+        hearts = index.data(HeartsRole)
+        rect = option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.background)
+        painter.drawRoundedRect(QtCore.QRectF(rect), 12, 12)
+
+        text_rect = rect.adjusted(10, 0, -10, 0)
+        painter.setPen(QtGui.QColor("white"))
+        painter.setFont(self.name_font)
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, name)
+        painter.setFont(self.hearts_font)
+        hearts_rect = text_rect.adjusted(self.name_metrics.horizontalAdvance(name) + 20, 0, 0, 0)
+        painter.drawText(hearts_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, "❤️" * hearts)
+        painter.restore()
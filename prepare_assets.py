@@ -0,0 +1,73 @@
+"""Make downscaled, recompressed copies of the client images.
+
+For every image in ASSETS it writes images/variants/<name>_<width>.<ext>
+for each width in WIDTHS that is smaller than the original, plus a
+manifest.json the client's pixmap cache reads to pick a variant. Opaque
+images become progressive JPEGs; images with transparency stay PNG.
+Needs Pillow (pip install Pillow); the client works without the
+variants, it just loads the originals.
+
+    python prepare_assets.py --widths 640 1024 1600 --quality 82
+"""
+import argparse
+import json
+import os
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ASSET_DIR = "images"
+VARIANT_DIR = os.path.join(ASSET_DIR, "variants")
+MANIFEST = os.path.join(VARIANT_DIR, "manifest.json")
+ASSETS = ("Backgroundimg.jpg", "Designer.jpg", "logo.png", "logoNamenobg.png")
+WIDTHS = (640, 1024, 1600)
+
+
+def has_alpha(image):
+    return image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def make_variants(name, widths, quality):
+    path = os.path.join(ASSET_DIR, name)
+    stem = os.path.splitext(name)[0]
+    variants = []
+    with Image.open(path) as original:
+        alpha = has_alpha(original)
+        image = original.convert("RGBA" if alpha else "RGB")
+    for width in sorted(widths):
+        if width >= image.width:
+            break
+        height = round(image.height * width / image.width)
+        scaled = image.resize((width, height), Image.LANCZOS)
+        if alpha:
+            out_path = os.path.join(VARIANT_DIR, f"{stem}_{width}.png")
+            scaled.save(out_path, optimize=True)
+        else:
+            out_path = os.path.join(VARIANT_DIR, f"{stem}_{width}.jpg")
+            scaled.save(out_path, quality=quality, optimize=True, progressive=True)
+        variants.append({"width": width, "height": height, "path": out_path.replace(os.sep, "/")})
+        print(f"{out_path}: {width}x{height}, {os.path.getsize(out_path) / 1024:.0f} KB "
+              f"(original {os.path.getsize(path) / 1024:.0f} KB)")
+    return {"width": image.width, "height": image.height, "variants": variants}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate downscaled client images")
+    parser.add_argument("--widths", type=int, nargs="+", default=list(WIDTHS))
+    parser.add_argument("--quality", type=int, default=82, help="JPEG quality")
+    args = parser.parse_args()
+    if Image is None:
+        raise SystemExit("prepare_assets needs Pillow: pip install Pillow")
+
+    os.makedirs(VARIANT_DIR, exist_ok=True)
+    manifest = {name: make_variants(name, args.widths, args.quality)
+                for name in ASSETS if os.path.exists(os.path.join(ASSET_DIR, name))}
+    with open(MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"manifest written to {MANIFEST}")
+
+
+if __name__ == '__main__':
+    main()
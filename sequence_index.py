@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import os
+import struct
+from array import array
+
+log = logging.getLogger("bombparty.index")
+
+MAGIC = b"BPSI"
+VERSION = 1
+# magic, version, sha256 of the word list, number of sequences, size of the text blob
+HEADER = struct.Struct("<4sH32sII")
+
+
+class SequenceIndex:
+    """Every 2- and 3-letter challenge sequence with the number of words that contain it."""
+
+    def __init__(self, digest, counts):
+        self.digest = digest
+        self.counts = counts  # sequence -> number of lexicon words containing it
+        self.sequences_2 = [seq for seq in counts if len(seq) == 2]
+        self.sequences_3 = [seq for seq in counts if len(seq) == 3]
+
+    def __len__(self):
+        return len(self.counts)
+
+    def solutions(self, sequence):
+        return self.counts.get(sequence, 0)
+
+    @staticmethod
+    def file_digest(file_path):
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).digest()
+
+    @classmethod
+    def build(cls, words, digest):
+        counts = {}
+        for word in set(words):
+            # count each word once per sequence, even if the sequence repeats inside it
+            seen = {word[i:i + 2] for i in range(len(word) - 1)}
+            seen.update(word[i:i + 3] for i in range(len(word) - 2))
+            for seq in seen:
+                counts[seq] = counts.get(seq, 0) + 1
+        return cls(digest, counts)
+
+    def save(self, index_path):
+        sequences = list(self.counts)
+        blob = "\n".join(sequences).encode('utf-8')
+        counts = array('I', (self.counts[seq] for seq in sequences))
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.digest, len(sequences), len(blob)))
+            f.write(counts.tobytes())
+            f.write(blob)
+        os.replace(tmp_path, index_path)  # never leave a half-written index behind
+
+    @classmethod
+    def load(cls, index_path):
+        """Load a saved index, or return None if the file is missing or unreadable."""
+        try:
+            with open(index_path, 'rb') as f:
+                data = f.read()
+            magic, version, digest, size, blob_len = HEADER.unpack_from(data)
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC or version != VERSION:
+            return None
+
+        offset = HEADER.size
+        counts = array('I')
+        counts.frombytes(data[offset:offset + size * counts.itemsize])
+        offset += size * counts.itemsize
+        blob = data[offset:offset + blob_len].decode('utf-8')
+        sequences = blob.split("\n") if size else []
+        if len(sequences) != size or len(counts) != size:
+            return None
+        return cls(digest, dict(zip(sequences, counts)))
+
+    @classmethod
+    def load_or_build(cls, word_list_path, normalize, index_path=None):
+        """Load the index saved next to the word list, rebuilding it if the word list changed."""
+        if index_path is None:
+            index_path = os.path.splitext(word_list_path)[0] + ".seqidx"
+        digest = cls.file_digest(word_list_path)
+
+        index = cls.load(index_path)
+        if index is not None and index.digest == digest:
+            return index
+
+        with open(word_list_path, encoding='utf-8') as f:
+            words = [normalize(line.strip()) for line in f if line.strip()]
+        index = cls.build(words, digest)
+        try:
+            index.save(index_path)
+        except OSError as e:
+            log.warning("could not save sequence index to %s: %s", index_path, e)
+        return index
@@ -1,9 +1,35 @@
-import requests
-from bs4 import BeautifulSoup
+import json
+import logging
+import os
+import queue
 import random
 import socket
 import threading
-from encryption_manager import EncryptionManager
+import time
+from cryptography.exceptions import InvalidTag
+from encryption_manager import (EncryptionManager, KeyPool, SessionCipher, derive_resume_key, RESUME_MARKER,
+                                RESUME_TOKEN_SIZE, RESUME_SECRET_SIZE, RESUME_NONCE_SIZE)
+from word_validator import LexiconValidator, make_validator
+from verdict_cache import VerdictCache
+from verification_pool import VerificationPool
+from sequence_index import SequenceIndex
+from challenge_sampler import ChallengeSampler, DIFFICULTY_CURVES, load_difficulty_table
+from ngram_index import NgramIndex
+from event_loop import EventLoopServer
+from framing import MessageFramer, FrameDeframer, FrameTooLong
+import match_history
+from metrics import MetricsRegistry, MetricsHTTPServer, SnapshotWriter
+from server_logging import setup_logging, stop_logging
+import text_delta
+
+CLIENT_COMMANDS = ("INPUT_DELTA", "INPUT_CLIENT", "BUTTON", "ROOM")
+
+net_log = logging.getLogger("bombparty.net")
+lobby_log = logging.getLogger("bombparty.lobby")
+turns_log = logging.getLogger("bombparty.turns")
+send_log = logging.getLogger("bombparty.send")
+recv_log = logging.getLogger("bombparty.recv")
+
 
 class GameUtils:
     final_letters = {
@@ -29,27 +55,17 @@ class GameUtils:
         return ''.join(cls.final_letters.get(c, c) for c in word)
 
     @classmethod
-    # Function to load words and generate sequences
+    # Function to load words and generate sequences (cached on disk by SequenceIndex)
     def generate_sequences(cls, file_path):
-        with open(file_path, encoding='utf-8') as f:
-            words = [cls.normalize(line.strip()) for line in f if line.strip()]
-
-        sequences_2 = set()
-        sequences_3 = set()
-
-        for word in words:
-            length = len(word)
-            for i in range(length - 1):  # 2-letter sequences
-                sequences_2.add(word[i:i + 2])
-            for i in range(length - 2):  # 3-letter sequences
-                sequences_3.add(word[i:i + 3])
-        print(sequences_2, '\n')
-        print(sequences_3)
-        return list(sequences_2), list(sequences_3)
+        index = SequenceIndex.load_or_build(file_path, cls.normalize)
+        return index.sequences_2, index.sequences_3
 
     @staticmethod
     # Function to pick a random sequence
-    def pick_sequence(sequences_2, sequences_3):
+    def pick_sequence(sequences_2, sequences_3, sampler=None, difficulty=None):
+        if sampler is not None:
+            # weighted by how many words solve each sequence
+            return sampler.draw(difficulty)
         if random.random() < 0.7:
             # 70% chance for 2-letter
             return random.choice(sequences_2)
@@ -58,58 +74,62 @@ class GameUtils:
             return random.choice(sequences_3)
 
     @staticmethod
-    def verify(word, letters):
+    def verify(word, letters, validator):
         if letters not in word:
             return False
-        url = "https://milog.co.il/"
-        response = requests.get(url + word)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        div_content = soup.find('div', class_='sr_below_text')
-        if div_content:
-            sub_content = div_content.get_text().split(' ')
-            return sub_content[0] == "התקבלו" and sub_content[1].isnumeric()
-        return False
+        return validator.is_valid(word)
 
 
 class Player:
-    def __init__(self, name, socket, player_id, server, lives=3):
+    def __init__(self, name, connection, player_id, server, lives=3):
         self.name = name
-        self.socket = socket  # Store the player's socket connection
+        self.connection = connection  # the player's Connection on the server's event loop
         self.id = player_id
         self.lives = lives
+        self.initial_lives = lives  # restored when the room goes back to the lobby
         self.letters = ""
         self.server = server
+        self.room = None  # set when the player joins a Room
+        self.inbox = queue.Queue(maxsize=256)  # messages the event loop received from this player
+        self.input_dropped = -1  # connection.dropped when this player last got the full typed text
+        self.session_token = None  # lets a dropped client reconnect into this Player without RSA
+        self.resume_secret = None
+        self.disconnected_at = None  # set while the server waits for the client to resume
 
     def send_message(self, message):
-        """Send a message to the player via their socket."""
-        try:
-            # print(f"player{self.id},sent:  {message}")
-            if message:
-                self.socket.sendall(message.encode())  # Send encoded message
-                print(f"send to client:{message}")
-        except (ConnectionResetError, BrokenPipeError, OSError):
-            self.server.remove_completely(self)  # close connection with client
-        except Exception as e:
-            print(f"Error sending to {self.name}: {e}")
+        """Queue a message to the player; the event loop writes it to the socket."""
+        if message:
+            # stale live-typing updates may be dropped for a client that can't keep up
+            droppable = message.startswith(("UPDATE_INPUT|", "UPDATE_DELTA|"))
+            self.server.loop.send(self.connection, message.encode(), droppable)
+            self.server.messages_out.inc(type=message.split("|", 1)[0])
+            send_log.debug("to %s: %r", self.name, message)
 
     def set_letters(self, letters):
         self.letters = letters
 
-    def receive_message(self):
-        """Receive a message from the player (blocking)."""
+    def deliver(self, message):
+        """Called by the event loop for every message from this player."""
         try:
-            data = self.socket.recv(1024).decode()
-            messages = data.split("\n")
-            for msg in messages:
-                print(f"rcv: {msg} from player{self.id}")
-                return msg  # Receive and decode message
-        except socket.timeout:
-            raise  # Let timeout propagate so `get_word` can catch it
-        except (ConnectionResetError, BrokenPipeError, OSError):
-            self.server.remove_completely(self)  # close connection with client
-        except Exception as e:
-            print(f"Error receiving from {self.name}: {e}")
-            return None  # Return None for other errors
+            self.inbox.put_nowait(message)
+        except queue.Full:
+            recv_log.warning("inbox of %s full, dropping %r", self.name, message)
+
+    def clear_inbox(self):
+        while True:
+            try:
+                self.inbox.get_nowait()
+            except queue.Empty:
+                return
+
+    def receive_message(self, timeout=None):
+        """Receive a message from the player (blocking, None once disconnected)."""
+        try:
+            msg = self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            raise socket.timeout  # the turn's deadline passed
+        recv_log.debug("from %s#%s: %r", self.name, self.id, msg)
+        return msg
 
     def lose_life(self):
         """Reduce the player's lives when they fail a turn."""
@@ -120,52 +140,122 @@ class Player:
     def get_life(self):
         return self.lives  # Return remaining lives
 
-    def settimeout(self, timeout):
-        self.socket.settimeout(timeout)  # Pass timeout to the actual socket
+    @property
+    def connected(self):
+        return not self.connection.closed
 
+    @property
+    def present(self):
+        """Connected, or disconnected but still inside the grace period to resume."""
+        return self.connected or self.disconnected_at is not None
 
-class Server:
-    def __init__(self, ip="0.0.0.0", port=65432):
-        self.ip = ip
-        self.port = port
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.encryption_manager = EncryptionManager(is_server=True)
+
+class Room:
+    """One match: its own players, used words and turn loop.
+
+    All rooms share the server's lexicon, indexes and verification pool.
+    """
+
+    def __init__(self, name, server, difficulty_curve):
+        self.name = name
+        self.server = server
+        # a name from DIFFICULTY_CURVES or any callable(turn, lives_lost) -> 0.0..1.0
+        self.difficulty_curve = DIFFICULTY_CURVES.get(difficulty_curve, difficulty_curve)
         self.start_game = False
         self.playing_players = []
         self.all_players = []
+        self.lobby_lock = threading.RLock()  # joins run on the event loop, end_game on the turn thread
+        self.turn_thread = None  # runs manage_turns while a game is on
         self.used_words = set()
-        self.num_player = 0
+        # live typing is coalesced: only the latest text is broadcast on each input tick,
+        # as a delta from what viewers were shown, with a full checkpoint every checkpoint_seconds
+        self.pending_input = None  # (sender, text)
+        self.input_lock = threading.Lock()
+        self.typed_text = ""  # the current player's text, rebuilt from their deltas
+        self.shown_input = None  # what viewers were last sent; None means send a checkpoint next
+        self.input_sender = None
+        self.next_checkpoint = 0.0
+        self.checkpoint_seconds = server.input_checkpoint_seconds
+        self.turn_seconds = server.turn_seconds
+        self.turn_started_at = 0.0
+        self.turn_deadline = 0.0
+        self.game_id = None  # in the server's match history
+        self.turn = 0
+        self.difficulty = None  # of the current challenge, when a difficulty curve picked it
+        self.awaiting_first_key = False  # until the current player sends something this turn
+
+    def is_empty(self):
+        return not self.all_players
+
+    def add_player(self, player):
+        with self.lobby_lock:
+            player.room = self
+            self.all_players.append(player)
+            if self.start_game:
+                # a match is running: watch it now, play in the next one
+                player.send_message(self.state_snapshot(player))
+                return
+            self.playing_players.append(player)
+            self.broadcast_player_list()  # 🔁 Notify all clients
 
-    def add_player(self, client_socket, name):
-        self.num_player += 1
-        print("שם המשתמש שהתקבל:", name)
-        player = Player(name, client_socket, self.num_player, self)
-        self.playing_players.append(player)
-        self.all_players.append(player)
-        self.broadcast_player_list()  # 🔁 Notify all clients
-
-        admin = self.playing_players[0]
-        if len(self.playing_players) >= 2 and not self.start_game:
-            admin.send_message("ADMIN|YOU_ARE_THE_HOST:")
-            self.before_game_start(admin)
-
-    def before_game_start(self, admin):
+            admin = self.playing_players[0]
+            if len(self.playing_players) >= 2:
+                admin.send_message("ADMIN|YOU_ARE_THE_HOST:\n")
+
+    def before_game_start(self, admin, message):
+        # runs on the event loop for every lobby message; only the host can start the game
         names = [p.name for p in self.playing_players]
-        while not self.start_game and len(self.playing_players) >= 2:
-            message = admin.receive_message()
-            print(f"in while {message}")
-            if message == "BUTTON|START_GAME":
-                self.start_game = True
-                for player in self.playing_players:
-                    player.send_message(f"ADMIN|GAME_STARTED:"+",".join(names))
-                random.shuffle(self.playing_players)
-                threading.Thread(target=self.manage_turns, daemon=True).start()
+        lobby_log.debug("room %s: %r from %s", self.name, message, admin.name)
+        if message == "BUTTON|START_GAME" and admin is self.playing_players[0] and len(self.playing_players) >= 2:
+            self.start_game = True
+            for player in self.playing_players:
+                player.send_message(f"ADMIN|GAME_STARTED:"+",".join(names)+"\n")
+            random.shuffle(self.playing_players)
+            self.turn_thread = threading.Thread(target=self.manage_turns, daemon=True)
+            self.turn_thread.start()
+
+    def remove_player(self, player):
+        """Take a player out of the lobby or the audience (e.g. to join another room)."""
+        with self.lobby_lock:
+            if player in self.all_players:
+                self.all_players.remove(player)
+            if player in self.playing_players:
+                host = self.playing_players[0]
+                self.playing_players.remove(player)
+                self.broadcast_player_list()  # 🔁 Notify all clients
+                # the host left the lobby: the next player becomes host and needs the start button
+                if player is host and not self.start_game and len(self.playing_players) >= 2:
+                    self.playing_players[0].send_message("ADMIN|YOU_ARE_THE_HOST:\n")
 
     def remove_completely(self, player):
-        if player in self.all_players:
-            self.all_players.remove(player)
-            print(f"{player.name} disconnected")
-            player.socket.close()
+        with self.lobby_lock:
+            if player in self.all_players:
+                self.all_players.remove(player)
+                net_log.info("%s disconnected", player.name)
+                self.server.loop.close(player.connection)
+                player.clear_inbox()
+                player.deliver(None)  # wake up a turn waiting on this player
+            if not self.start_game:
+                self.remove_player(player)  # nobody waits for a player who left the lobby
+
+    def state_snapshot(self, player):
+        """Everything a resumed client needs to redraw the room, as one STATE message."""
+        state = {
+            "room": self.name,
+            "you": player.name,
+            "started": self.start_game,
+            "players": [p.name for p in self.playing_players],
+            "lives": {p.name: p.lives for p in self.all_players},
+            "host": bool(self.playing_players) and self.playing_players[0] is player and not self.start_game,
+        }
+        if self.start_game and self.playing_players:
+            current = self.playing_players[0]
+            state["turn"] = current.name
+            state["letters"] = current.letters
+            state["seconds_left"] = round(max(0.0, self.turn_deadline - time.monotonic()), 1)
+            with self.input_lock:
+                state["typed"] = self.typed_text
+        return "STATE|" + json.dumps(state, ensure_ascii=False, separators=(",", ":")) + "\n"
 
     def move_to_spectate(self, player):
         if player in self.playing_players:
@@ -173,16 +263,56 @@ class Server:
             self.broadcast_player_list()  # 🔁 Notify all clients
 
     def update_input(self, current_client, text):
+        if text not in (None, "ENTER"):
+            with self.input_lock:
+                self.pending_input = (current_client, text)
+
+    def reset_input(self):
+        """Start a new turn's typing from an empty text."""
+        with self.input_lock:
+            self.pending_input = None
+            self.typed_text = ""
+            self.shown_input = None
+            self.input_sender = None
+
+    def flush_input(self):
+        # called by the server on every input tick
+        with self.input_lock:
+            if self.shown_input is not None:
+                self.resync_viewers()
+            pending, self.pending_input = self.pending_input, None
+            if pending is None:
+                return
+            current_client, text = pending
+            now = time.monotonic()
+            checkpoint = self.shown_input is None or now >= self.next_checkpoint
+            if checkpoint:
+                message = f"UPDATE_INPUT|{text}\n"
+                self.next_checkpoint = now + self.checkpoint_seconds
+            elif text != self.shown_input:
+                message = "UPDATE_DELTA|" + text_delta.encode(*text_delta.diff(self.shown_input, text)) + "\n"
+            else:
+                return
+            self.shown_input, self.input_sender = text, current_client
+            for player in self.all_players:
+                if current_client.id != player.id:
+                    if checkpoint:
+                        player.input_dropped = player.connection.dropped
+                    player.send_message(message)
+
+    def resync_viewers(self):
+        # a viewer whose send queue overflowed lost deltas; a checkpoint puts them back in sync
+        # before the next delta is applied on top of it (called with input_lock held)
         for player in self.all_players:
-            if current_client.id != player.id and text not in (None, "ENTER"):
-                player.send_message(f"UPDATE_INPUT|{text}\n")
+            dropped = player.connection.dropped
+            if dropped != player.input_dropped and player is not self.input_sender:
+                player.input_dropped = dropped
+                player.send_message(f"UPDATE_INPUT|{self.shown_input}\n")
 
     def update_all_client(self, current_player):
         for player in self.all_players:
             if player.id != current_player.id:
-                message = f"UPDATE_LETTERS|{current_player.letters}\n"
-                print(f"Sending to {player.name}: {message}")  # Log the message
-                player.send_message(message)
+                player.send_message(f"UPDATE_LETTERS|{current_player.letters}\n")
 
     def broadcast_player_list(self):
         names = [p.name for p in self.playing_players]
@@ -190,64 +320,115 @@ class Server:
         for player in self.all_players:
             player.send_message(message)
 
-    def get_word(self, player, timer_expired):
-        text = ""
-        try:
-            player.settimeout(0.1)  # Reduce timeout to check for expired timer more frequently
-
-            while not timer_expired.is_set():  # Keep checking if time expired
+    def get_word(self, player, deadline):
+        # wakes up on the first of: a message, the turn deadline, the player disconnecting
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                data = player.receive_message(remaining)
+            except socket.timeout:
+                return None
+            if data is None:  # disconnected
+                return None
+            if self.awaiting_first_key:
+                self.awaiting_first_key = False
+                self.server.first_keystroke.observe(time.monotonic() - self.turn_started_at)
+            command, _, value = data.partition('|')
+            if command == "INPUT_DELTA":
                 try:
-                    data = player.receive_message()
-                    if data.count('|') == 1:
-                        _, input_c = data.split('|', 1)
-                        self.update_input(player, input_c)
-                        if input_c == "ENTER":
-                            return text
-                        if input_c:
-                            text = input_c
-                except socket.timeout:
-                    continue  # keep looping to check if time expired
-        except Exception as e:
-            print(f"Error receiving message: {e}")
-
-        return None
-
-    @staticmethod
-    def timeout(check_expired_thread):
-        check_expired_thread.set()
+                    self.typed_text = text_delta.apply(self.typed_text, *text_delta.decode(value))
+                except ValueError as e:
+                    turns_log.warning("room %s: bad delta from %s: %s", self.name, player.name, e)
+                    continue
+                self.update_input(player, self.typed_text)
+            elif command == "INPUT_CLIENT" and '|' not in value:
+                # full-text input from clients that don't send deltas
+                self.update_input(player, value)
+                if value == "ENTER":
+                    return self.typed_text
+                if value:
+                    self.typed_text = value
+
+    def record(self, player, event, sequence=None, word=None, elapsed=None):
+        if self.game_id is not None:
+            self.server.match_history.record(self.game_id, self.turn, player.name, sequence, event,
+                                             word, elapsed, self.difficulty)
+
+    def pick_challenge(self, sequences_2, sequences_3, turn, lives_lost, attempts=10):
+        for _ in range(attempts):
+            if self.difficulty_curve is None:
+                challenge = GameUtils.pick_sequence(sequences_2, sequences_3)
+            else:
+                self.difficulty = self.difficulty_curve(turn, lives_lost)
+                challenge = GameUtils.pick_sequence(sequences_2, sequences_3, self.server.challenge_sampler,
+                                                    self.difficulty)
+            # don't hand out a challenge whose every solution was already used this game
+            if self.server.ngram_index.is_solvable(challenge, self.used_words):
+                return challenge
+        return challenge
 
     def manage_turns(self):
-        sequences_2, sequences_3 = GameUtils.generate_sequences('word_list.txt')
+        sequences_2, sequences_3 = self.server.sequence_index.sequences_2, self.server.sequence_index.sequences_3
+        turn = 0
+        lives_lost = 0
+        roster = list(self.playing_players)  # spectators who joined later didn't lose anything
+        if self.server.match_history is not None:
+            self.game_id = self.server.match_history.start_game(self.name, [p.name for p in self.playing_players])
         while len(self.playing_players) > 1:
             current_player = self.playing_players[0]  # Get the first player in the list
-            challenge = GameUtils.pick_sequence(sequences_2, sequences_3)
+            challenge = self.pick_challenge(sequences_2, sequences_3, turn, lives_lost)
+            turn += 1
+            self.turn = turn
+            current_player.clear_inbox()  # forget whatever was typed while it wasn't their turn
+            self.flush_input()  # viewers see the last word typed before the next TURN_START
+            self.reset_input()
             # Notify player that it's their turn
             current_player.send_message(f"TURN_START|{challenge}\n")
-            print(f"server: It's {current_player.name}'s turn. Letters: {challenge}")
+            turns_log.info("room %s: %s's turn, letters %s", self.name, current_player.name, challenge)
             current_player.set_letters(challenge)  # set the letters in player
             self.update_all_client(current_player)
-            timer_expired = threading.Event()
-
-            # start timer
-            timer = threading.Timer(10, self.timeout, args=(timer_expired,))
-            timer.start()
-
-            while not timer_expired.is_set() and current_player in self.playing_players:
-                word = self.get_word(current_player, timer_expired)
-                print(f"***{word}***")
-                if word is not None and GameUtils.verify(word, challenge) and word not in self.used_words:
-                    timer.cancel()  # cancel timer
+            self.turn_started_at = time.monotonic()
+            self.awaiting_first_key = True
+            deadline = self.turn_started_at + self.turn_seconds
+            self.record(current_player, match_history.TURN_START, challenge)
+
+            self.turn_deadline = deadline
+            # a player who dropped keeps their turn running: they may resume before the deadline
+            while (time.monotonic() < deadline and current_player in self.playing_players
+                   and current_player.present):
+                word = self.get_word(current_player, deadline)
+                if word is None:
+                    continue  # the loop condition tells why: time's up or the player left
+                turns_log.debug("room %s: %s submitted %r", self.name, current_player.name, word)
+                verify_started = time.perf_counter()
+                is_valid = self.server.verification_pool.verify(word, challenge)
+                self.server.verify_seconds.observe(time.perf_counter() - verify_started)
+                elapsed = time.monotonic() - self.turn_started_at
+                if is_valid and word not in self.used_words:
+                    self.server.verify_results.inc(outcome="valid")
+                    self.record(current_player, match_history.VALID, challenge, word, elapsed)
                     self.used_words.add(word)
                     current_player.send_message("VALID_WORD|Turn over\n")
+                    self.server.turn_duration.observe(elapsed, outcome="solved")
                     break
                 elif word in self.used_words:
+                    self.server.verify_results.inc(outcome="used")
+                    self.record(current_player, match_history.USED, challenge, word, elapsed)
                     current_player.send_message(f"USED_WORD|Try again. Letters: {challenge}\n")
                 else:
+                    self.server.verify_results.inc(outcome="invalid")
+                    self.record(current_player, match_history.INVALID, challenge, word, elapsed)
                     current_player.send_message(f"INVALID_WORD|Try again. Letters: {challenge}\n")
 
             else:
+                elapsed = time.monotonic() - self.turn_started_at
+                self.server.turn_duration.observe(elapsed, outcome="time_up")
+                self.record(current_player, match_history.TIME_UP, challenge, elapsed=elapsed)
                 current_player.send_message("TIME_UP|You lost a life!\n")
                 current_player.lose_life()
+                lives_lost += 1
                 for player in self.all_players:
                     player.send_message(f"PLAYER_LOST_LIFE|{current_player.name}:{current_player.get_life()}\n")
 
@@ -255,59 +436,381 @@ class Server:
                 self.move_to_spectate(current_player)  # remove the player from the playing list
 
                 if len(self.playing_players) == 1:
+                    self.record(self.playing_players[0], match_history.GAME_OVER)
                     self.playing_players[0].send_message("GAME_OVER|WIN\n")
                     for player in self.all_players:
-                        if player.id != self.playing_players[0].id:
+                        if player.id != self.playing_players[0].id and player in roster:
                             player.send_message("GAME_OVER|LOSE\n")
 
             else:
                 self.playing_players.append(self.playing_players.pop(0))  # Move to the next player
+        self.end_game()
+
+    def end_game(self):
+        """Back to the lobby: everyone still in the room plays the next game, the first of them hosts."""
+        with self.lobby_lock:
+            self.used_words = set()
+            self.game_id = None
+            self.difficulty = None
+            self.turn = 0
+            self.reset_input()
+            for player in self.all_players:
+                player.lives = player.initial_lives
+                player.letters = ""
+                player.clear_inbox()
+            self.playing_players = list(self.all_players)
+            self.start_game = False
+            lobby_log.info("room %s: game over, back to the lobby", self.name)
+            self.broadcast_player_list()
+            if len(self.playing_players) >= 2:
+                self.playing_players[0].send_message("ADMIN|YOU_ARE_THE_HOST:\n")
+
+
+class Server:
+    def __init__(self, ip="0.0.0.0", port=65432, validator_backend="lexicon+milog", lexicon_path='word_list.txt',
+                 cache_path='verdicts.db', cache_size=10000, cache_purge_seconds=3600, verify_timeout=3.0,
+                 difficulty_curve="ramp", difficulty_table=None, input_tick_hz=25, max_send_queue=256,
+                 overflow_policy="drop_input", turn_seconds=10, input_checkpoint_seconds=2.0,
+                 key_file='server_key.pem', session_keys=False, resume_grace_seconds=30, history_path='history.db',
+                 metrics_port=None, metrics_file=None, metrics_interval=10.0,
+                 log_level="INFO", log_levels=None, log_sample=None):
+        # logs go through a queue to a writer thread; per-keystroke tracing is DEBUG on "send"/"recv",
+        # e.g. log_levels={"recv": "DEBUG"}, log_sample={"recv": 0.1} keeps one in ten
+        setup_logging(log_level, log_levels, log_sample)
+        self.ip = ip
+        self.port = port
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # every connection has a bounded send queue drained by the loop, so a slow client can't block a game
+        self.loop = EventLoopServer(self, max_queue=max_send_queue, overflow_policy=overflow_policy)
+        # UPDATE_INPUT is sent at most input_tick_hz times a second; turn events are sent right away
+        self.loop.call_every(1.0 / input_tick_hz, self.flush_inputs)
+        # the RSA key is loaded from key_file (generated on first run) so restarts don't pay for keygen
+        self.encryption_manager = EncryptionManager(is_server=True, key_file=key_file)
+        # with session_keys every connection gets its own RSA key, pre-generated in the background
+        self.key_pool = KeyPool() if session_keys else None
+        # "lexicon" checks the local word list only, "lexicon+milog" falls back to milog.co.il;
+        # word_list.txt is only the challenge seed list, so "lexicon" alone rejects most real words
+        # remote verdicts are cached in memory and on disk so repeated words skip the network
+        self.verdict_cache = VerdictCache(cache_path, cache_size) if validator_backend != "lexicon" else None
+        if self.verdict_cache is not None:
+            self.purge_verdicts()  # expired verdicts are dropped at startup and every cache_purge_seconds
+            self.loop.call_every(cache_purge_seconds, self.purge_verdicts)
+        self.lexicon = LexiconValidator(lexicon_path, GameUtils.normalize)
+        self.sequence_index = SequenceIndex.load_or_build(lexicon_path, GameUtils.normalize)
+        # a table from difficulty_analytics.py replaces estimated difficulties with ones measured in play
+        measured = load_difficulty_table(difficulty_table) if difficulty_table else None
+        self.challenge_sampler = ChallengeSampler(self.sequence_index.counts, measured=measured)
+        # posting lists are saved next to the .seqidx, keyed by the same digest of the word list
+        self.ngram_index = NgramIndex.load_or_build(lexicon_path, GameUtils.normalize, self.sequence_index.digest)
+        self.difficulty_curve = difficulty_curve  # default for new rooms
+        self.validator = make_validator(validator_backend, self.lexicon, self.verdict_cache)
+        # lookups run on worker threads; if one takes longer than verify_timeout the lexicon decides
+        self.verification_pool = VerificationPool(self.validator, GameUtils.verify, fallback=self.lexicon,
+                                                  timeout=verify_timeout)
+        self.turn_seconds = turn_seconds
+        # every turn event is appended to history_path by a background writer (None turns it off)
+        self.match_history = match_history.MatchHistory(history_path) if history_path else None
+        self.input_checkpoint_seconds = input_checkpoint_seconds  # full UPDATE_INPUT between deltas
+        self.rooms = {}
+        # a client that drops can reconnect with its session token within resume_grace_seconds
+        self.sessions = {}  # token -> Player
+        self.resume_grace_seconds = resume_grace_seconds
+        self.loop.call_every(1.0, self.expire_sessions)
+        self.default_room = "main"  # where players land after the handshake
+        self.num_player = 0
+        self.max_handshake = 4096  # bytes of RSA ciphertext we accept for the session key
+        self.max_message = 4096  # longest line a client may send before we drop the connection
+        # metrics are served as Prometheus text on 127.0.0.1:metrics_port and/or written to metrics_file
+        self.metrics = MetricsRegistry()
+        self.register_metrics()
+        if metrics_port is not None:
+            MetricsHTTPServer(self.metrics, port=metrics_port).start()
+        if metrics_file is not None:
+            SnapshotWriter(self.metrics, metrics_file, metrics_interval).start()
+
+    def register_metrics(self):
+        m = self.metrics
+        self.messages_in = m.counter("messages_in_total", "Messages received from clients", ("type",))
+        self.messages_out = m.counter("messages_out_total", "Messages queued to clients", ("type",))
+        self.verify_seconds = m.histogram("verify_seconds", "Time to verify a submitted word")
+        self.verify_results = m.counter("verify_results_total", "Submitted words by verdict", ("outcome",))
+        self.turn_duration = m.histogram("turn_seconds", "TURN_START until the turn ends", ("outcome",),
+                                         buckets=(0.5, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 15, 30))
+        self.first_keystroke = m.histogram("first_keystroke_seconds", "TURN_START until the player's first message",
+                                           buckets=(0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10))
+        m.gauge("active_connections", "Open client connections", callback=lambda: len(self.loop.connections))
+        m.gauge("players", "Players that finished the handshake",
+                callback=lambda: sum(1 for conn in list(self.loop.connections) if conn.player))
+        m.gauge("rooms", "Open rooms", callback=lambda: len(self.rooms))
+        m.gauge("games_running", "Rooms with a game in progress",
+                callback=lambda: sum(1 for room in list(self.rooms.values())
+                                     if room.turn_thread is not None and room.turn_thread.is_alive()))
+        m.gauge("send_queue_depth_max", "Deepest outbound queue of any connection",
+                callback=lambda: max(self.loop.queue_depths().values(), default=0))
+        m.gauge("send_queue_depth", "Outbound queue depth per connection", ("client",),
+                callback=lambda: {(client,): depth for client, depth in self.send_queue_depths().items()})
+        m.counter("send_failures_total", "Socket errors while writing to clients",
+                  callback=lambda: self.loop.send_failures)
+        m.counter("send_overflow_disconnects_total", "Clients disconnected for a full send queue",
+                  callback=lambda: self.loop.overflow_disconnects)
+        m.counter("send_dropped_messages_total", "Live-typing updates dropped for slow clients",
+                  callback=lambda: self.loop.dropped_messages)
+        m.counter("verify_timeouts_total", "Lookups that fell back to the local verdict",
+                  callback=lambda: self.verification_pool.timeouts)
+        m.counter("verify_errors_total", "Lookups that raised", callback=lambda: self.verification_pool.errors)
+        if self.verdict_cache is not None:
+            m.counter("verdict_cache_hits_total", "Word lookups answered by the verdict cache", ("tier",),
+                      callback=lambda: {("memory",): self.verdict_cache.stats()["memory_hits"],
+                                        ("disk",): self.verdict_cache.stats()["disk_hits"]})
+            m.counter("verdict_cache_misses_total", "Word lookups that went to the remote validator",
+                      callback=lambda: self.verdict_cache.stats()["misses"])
+            m.gauge("verdict_cache_entries", "Verdicts held in memory",
+                    callback=lambda: self.verdict_cache.stats()["size"])
+        if self.match_history is not None:
+            m.counter("history_rows_written_total", "Match history rows written",
+                      callback=lambda: self.match_history.written)
+            m.counter("history_rows_dropped_total", "Match history rows dropped because the writer fell behind or failed",
+                      callback=lambda: self.match_history.dropped)
+            m.counter("history_write_errors_total", "Match history batches SQLite refused",
+                      callback=lambda: self.match_history.write_errors)
+
+    def get_room(self, name, difficulty_curve=None):
+        room = self.rooms.get(name)
+        if room is None:
+            room = Room(name, self, difficulty_curve or self.difficulty_curve)
+            self.rooms[name] = room
+            lobby_log.info("created room %s", name)
+        return room
+
+    def send_queue_depths(self):
+        """Outbound queue depth per connected player."""
+        return {f"{conn.player.name}#{conn.player.id}" if conn.player else str(conn.address): depth
+                for conn, depth in self.loop.queue_depths().items()}
+
+    def purge_verdicts(self):
+        # off the loop thread: the DELETE holds the cache lock and touches the disk
+        threading.Thread(target=self.verdict_cache.purge_expired, daemon=True).start()
+
+    def flush_inputs(self):
+        for room in list(self.rooms.values()):
+            room.flush_input()
+
+    def add_player(self, connection, name):
+        self.num_player += 1
+        net_log.info("שם המשתמש שהתקבל: %s", name)
+        player = Player(name, connection, self.num_player, self)
+        connection.player = player
+        self.issue_session(player)
+        self.get_room(self.default_room).add_player(player)
+
+    def issue_session(self, player):
+        # tokens are single use: every join and resume hands out a new one
+        self.sessions.pop(player.session_token, None)
+        player.session_token = os.urandom(RESUME_TOKEN_SIZE)
+        player.resume_secret = os.urandom(RESUME_SECRET_SIZE)
+        self.sessions[player.session_token] = player
+        player.send_message(f"SESSION|{player.session_token.hex()}:{player.resume_secret.hex()}\n")
+
+    def resume_player(self, connection, player):
+        old = player.connection
+        if not old.closed:
+            old.player = None  # a half-open old socket must not take the player with it
+            self.loop.close(old)
+        connection.player = player
+        player.connection = connection
+        player.disconnected_at = None
+        player.input_dropped = -1
+        net_log.info("%s resumed from %s", player.name, connection.address)
+        self.issue_session(player)
+        player.send_message(player.room.state_snapshot(player))
+
+    def expire_sessions(self):
+        now = time.monotonic()
+        for player in list(self.sessions.values()):
+            if player.disconnected_at is not None and now - player.disconnected_at > self.resume_grace_seconds:
+                net_log.info("%s did not resume in time", player.name)
+                player.disconnected_at = None
+                self.remove_completely(player)
+
+    def join_room(self, player, room_name, difficulty_curve=None):
+        if player.room.start_game and player in player.room.playing_players:
+            return  # can't walk out of a match you're playing in; spectators and the eliminated can
+        old_room = player.room
+        old_room.remove_player(player)
+        if old_room.is_empty() and old_room.name != self.default_room:
+            del self.rooms[old_room.name]
+        self.get_room(room_name, difficulty_curve).add_player(player)
+
+    def handle_room_command(self, player, value):
+        # ROOM|JOIN:<room>[:<difficulty curve>] or ROOM|LIST:
+        command, _, args = value.partition(":")
+        if command == "JOIN" and args:
+            room_name, _, curve = args.partition(":")
+            if curve and curve not in DIFFICULTY_CURVES:
+                curve = None
+            self.join_room(player, room_name, curve or None)
+        elif command == "LIST":
+            rooms = [f"{room.name}:{len(room.all_players)}" for room in self.rooms.values()]
+            player.send_message("ROOM_LIST|" + ",".join(rooms) + "\n")
 
-    def handle_client(self, client_socket, client_address):
-        print(f"[SERVER] New connection from {client_address}")
+    def remove_completely(self, player):
+        self.sessions.pop(player.session_token, None)
+        room = player.room
+        room.remove_completely(player)
+        if room.is_empty() and room.name != self.default_room:
+            self.rooms.pop(room.name, None)
+
+    # --- event loop callbacks ---
+    def connection_made(self, connection):
+        net_log.info("new connection from %s", connection.address)
+        connection.encryption_manager = self.encryption_manager
+        key = self.key_pool.get() if self.key_pool is not None else None
+        if key is not None:  # an empty pool falls back to the shared key rather than stalling the loop
+            connection.encryption_manager = EncryptionManager(is_server=True, private_key=key)
         # 1. שלח מפתח ציבורי (פעם אחת בלבד)
-        public_key_bytes = self.encryption_manager.get_serialized_public_key()
-        client_socket.sendall(len(public_key_bytes).to_bytes(4, 'big') + public_key_bytes)
+        public_key_bytes = connection.encryption_manager.get_serialized_public_key()
+        self.loop.send(connection, len(public_key_bytes).to_bytes(4, 'big') + public_key_bytes)
+
+    def data_received(self, connection, data):
+        if connection.closing:
+            return  # rejected; whatever else it sends is ignored until the loop closes it
+        if not connection.handshake_done:
+            connection.inbuf += data
+            self.handle_handshake(connection)
+            if not connection.handshake_done:
+                return
+            # whatever followed the key in the same packet is already encrypted traffic
+            data, connection.inbuf = bytes(connection.inbuf), bytearray()
+        self.handle_frames(connection, data)
+
+    def release_pool_key(self, connection):
+        # the public key had to be sent before we knew the client wouldn't use it
+        if connection.encryption_manager is not self.encryption_manager:
+            self.key_pool.put_back(connection.encryption_manager.private_key)
+            connection.encryption_manager = self.encryption_manager
+
+    def connection_lost(self, connection):
+        if not connection.handshake_done and connection.resume_token is None:
+            self.release_pool_key(connection)
+        player = connection.player
+        if player is None or player.connection is not connection:
+            return
+        if player.session_token in self.sessions and self.resume_grace_seconds > 0:
+            # keep the seat, lives and turn order; the game carries on without them meanwhile
+            player.disconnected_at = time.monotonic()
+            net_log.info("%s dropped, waiting %ss for them to resume", player.name, self.resume_grace_seconds)
+        else:
+            self.remove_completely(player)
 
+    def handle_handshake(self, connection):
         # 2. קבל אורך ההודעה המוצפנת (4 בייטים)
-        encrypted_length_bytes = client_socket.recv(4)
-        if len(encrypted_length_bytes) < 4:
-            print("[SERVER] Failed to receive encrypted message length.")
-            client_socket.close()
+        if len(connection.inbuf) < 4:
+            return
+        if connection.inbuf[:4] == RESUME_MARKER:
+            self.handle_resume_handshake(connection)
+            return
+        encrypted_length = int.from_bytes(connection.inbuf[:4], 'big')
+        if encrypted_length > self.max_handshake:
+            net_log.warning("handshake message from %s too long", connection.address)
+            self.loop.close(connection)
             return
-        encrypted_length = int.from_bytes(encrypted_length_bytes, 'big')
-
-        # 3. קרא את ההודעה המוצפנת במלואה
-        encrypted_message = b""
-        while len(encrypted_message) < encrypted_length:
-            chunk = client_socket.recv(encrypted_length - len(encrypted_message))
-            if not chunk:
-                print("[SERVER] Connection lost while receiving encrypted message.")
-                client_socket.close()
-                return
-            encrypted_message += chunk
+
+        # 3. קרא את מפתח הסשן המוצפן במלואו
+        if len(connection.inbuf) < 4 + encrypted_length:
+            return
+        encrypted_key = bytes(connection.inbuf[4:4 + encrypted_length])
+        del connection.inbuf[:4 + encrypted_length]
 
         try:
-            decrypted_message = self.encryption_manager.decrypt(encrypted_message)
-            print(f"[SERVER] Decrypted message: {decrypted_message}")
+            session_key = connection.encryption_manager.decrypt_bytes(encrypted_key)
+            connection.session = SessionCipher(session_key, is_server=True)
         except Exception as e:
-            print(f"[SERVER] Decryption failed: {e}")
-            client_socket.close()
+            net_log.warning("key exchange with %s failed: %s", connection.address, e)
+            self.loop.close(connection)
+            return
+        # from here on every frame in both directions is AES-GCM
+        connection.handshake_done = True
+        connection.deframer = FrameDeframer(self.max_message + 64)
+        connection.framer = MessageFramer(self.max_message)
+
+    def handle_resume_handshake(self, connection):
+        # RESUME_MARKER, token, client nonce; the key comes from the secret sent with the token
+        size = 4 + RESUME_TOKEN_SIZE + RESUME_NONCE_SIZE
+        if len(connection.inbuf) < size:
+            return
+        token = bytes(connection.inbuf[4:4 + RESUME_TOKEN_SIZE])
+        nonce = bytes(connection.inbuf[4 + RESUME_TOKEN_SIZE:size])
+        del connection.inbuf[:size]
+        self.release_pool_key(connection)  # resumes never use RSA
+        player = self.sessions.get(token)
+        if player is None:
+            net_log.warning("unknown session token from %s", connection.address)
+            self.loop.close(connection)
             return
-        self.add_player(client_socket, decrypted_message)
+        connection.session = SessionCipher(derive_resume_key(player.resume_secret, token, nonce), is_server=True)
+        connection.resume_token = token  # the player is attached once a frame proves the client has the key
+        connection.handshake_done = True
+        connection.deframer = FrameDeframer(self.max_message + 64)
+        connection.framer = MessageFramer(self.max_message)
+
+    def handle_frames(self, connection, data):
+        try:
+            for frame in connection.deframer.feed(data):
+                plaintext = connection.session.open(frame)
+                if connection.player is None and connection.resume_token is not None:
+                    # the first frame of a resumed session is RESUME, sealed with the derived key
+                    player = self.sessions.get(connection.resume_token)
+                    if plaintext != b"RESUME" or player is None:
+                        self.loop.close(connection)
+                        return
+                    self.resume_player(connection, player)
+                elif connection.player is None:
+                    # the first frame carries the player's name
+                    name = plaintext.decode('utf-8')
+                    self.add_player(connection, name)
+                else:
+                    self.handle_messages(connection, plaintext)
+        except FrameTooLong:
+            net_log.warning("frame from %s too long, closing", connection.address)
+            self.loop.close(connection)
+        except (InvalidTag, UnicodeDecodeError) as e:
+            net_log.warning("bad frame from %s, closing: %r", connection.address, e)
+            self.loop.close(connection)
+
+    def handle_messages(self, connection, data):
+        try:
+            messages = connection.framer.feed(data)
+        except FrameTooLong:
+            net_log.warning("message from %s too long, closing", connection.address)
+            self.loop.close(connection)
+            return
+        for message in messages:
+            self.dispatch(connection.player, message)
+
+    def dispatch(self, player, message):
+        command = message.split("|", 1)[0]
+        # clients choose the command, so unknown ones share a label instead of growing the series
+        self.messages_in.inc(type=command if command in CLIENT_COMMANDS else "OTHER")
+        if message.startswith("ROOM|"):
+            self.handle_room_command(player, message.split("|", 1)[1])
+        elif not player.room.start_game:
+            player.room.before_game_start(player, message)
+        elif player in player.room.playing_players:
+            player.deliver(message)  # spectators have nothing to say to the turn loop
 
     def start(self):
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server_socket.bind((self.ip, self.port))
-        self.server_socket.listen()
-        print(f"[SERVER] Server is listening on {self.ip}:{self.port}")
-        while True:
-            try:
-                client_socket, client_address = self.server_socket.accept()
-                threading.Thread(target=self.handle_client, args=(client_socket, client_address)).start()
-            except KeyboardInterrupt:
-                print("[SERVER] Shutting down...")
-                break
+        self.server_socket.listen(1024)
+        net_log.info("listening on %s:%s", self.ip, self.port)
+        try:
+            self.loop.serve_forever(self.server_socket)  # all connections are handled on this thread
+        except KeyboardInterrupt:
+            net_log.info("shutting down")
         self.server_socket.close()
+        if self.match_history is not None:
+            self.match_history.close()
+        stop_logging()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,101 @@
+"""Non-blocking logging for the server.
+
+Game threads and the event loop only put records on a queue; a listener
+thread formats and writes them, so a slow terminal never stalls a turn.
+Every module logs to a child of the "bombparty" logger named after its
+category:
+
+  net     connections, handshakes, bad frames
+  lobby   rooms and lobby messages
+  turns   turn start/end, submitted words
+  send    every message queued to a client (DEBUG)
+  recv    every message taken from a player's inbox (DEBUG)
+  loop    event loop send queues
+  verify  word lookups
+  index   sequence index
+
+    setup_logging("INFO", levels={"recv": "DEBUG"}, sample={"recv": 0.1})
+"""
+import itertools
+import logging
+import logging.handlers
+import queue
+import sys
+
+ROOT = "bombparty"
+CATEGORIES = ("net", "lobby", "turns", "send", "recv", "loop", "verify", "index", "history")
+
+_listener = None
+
+
+class SamplingFilter(logging.Filter):
+    """Pass about `rate` of the records below WARNING; warnings and errors always pass."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self.counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        return self.every and next(self.counter) % self.every == 0
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records without formatting them; drop them if the writer has fallen behind."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # the listener runs in this process, so formatting can wait for its thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level="INFO", levels=None, sample=None, stream=None, queue_size=10000):
+    """Route the "bombparty" loggers through a queue to `stream` (stderr by default).
+
+    levels maps a category to its own level, sample maps a category to the
+    fraction of its sub-WARNING records to keep. Calling it again replaces
+    the previous configuration.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    root = logging.getLogger(ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+    for category in CATEGORIES:
+        logger = logging.getLogger(f"{ROOT}.{category}")
+        logger.setLevel((levels or {}).get(category, logging.NOTSET))
+        for old in list(logger.filters):
+            logger.removeFilter(old)
+    for category, rate in (sample or {}).items():
+        logging.getLogger(f"{ROOT}.{category}").addFilter(SamplingFilter(rate))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)-5s [%(name)s] %(message)s"))
+    root.addHandler(DroppingQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush whatever is still queued."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
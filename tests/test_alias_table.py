@@ -0,0 +1,30 @@
+import random
+import pytest
+from challenge_sampler import AliasTable
+
+
+def implied_probabilities(table):
+    """The exact distribution draw() samples from."""
+    n = len(table.prob)
+    result = [p / n for p in table.prob]
+    for i, alias in enumerate(table.alias):
+        result[alias] += (1.0 - table.prob[i]) / n
+    return result
+
+
+@pytest.mark.parametrize("weights", [[1], [1, 1], [1, 2, 3, 4], [0, 5, 0, 1], [1e-9, 1, 1000], [0.3] * 7])
+def test_distribution_matches_weights(weights):
+    total = sum(weights)
+    assert implied_probabilities(AliasTable(weights)) == pytest.approx([w / total for w in weights], abs=1e-9)
+
+
+def test_zero_weight_is_never_drawn():
+    table = AliasTable([0, 1, 0, 3])
+    rng = random.Random(3)
+    assert {table.draw(rng) for _ in range(5000)} <= {1, 3}
+
+
+@pytest.mark.parametrize("weights", [[], [0, 0]])
+def test_needs_a_positive_weight(weights):
+    with pytest.raises(ValueError):
+        AliasTable(weights)
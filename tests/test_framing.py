@@ -0,0 +1,65 @@
+import pytest
+from framing import MessageFramer, FrameDeframer, FrameTooLong, MAX_FRAME
+
+
+def feed_all(framer, chunks):
+    messages = []
+    for chunk in chunks:
+        messages += framer.feed(chunk)
+    return messages
+
+
+def test_split_utf8_at_every_byte():
+    data = "שלום\nעולם\n".encode('utf-8')
+    for cut in range(len(data) + 1):
+        assert feed_all(MessageFramer(), [data[:cut], data[cut:]]) == ["שלום", "עולם"]
+
+
+def test_byte_at_a_time():
+    data = "TURN_START|אב\nUPDATE_INPUT|שלו\nVALID_WORD|Turn over\n".encode('utf-8')
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    assert feed_all(MessageFramer(), chunks) == ["TURN_START|אב", "UPDATE_INPUT|שלו", "VALID_WORD|Turn over"]
+
+
+def test_tail_is_carried_over_once():
+    framer = MessageFramer()
+    assert framer.feed(b"a\nbc") == ["a"]
+    assert framer.feed(b"d") == []
+    assert framer.feed(memoryview(b"\ne\n")) == ["bcd", "e"]
+    assert framer.feed(b"") == []
+
+
+def test_empty_lines_are_skipped():
+    assert MessageFramer().feed(b"\n\na\n\n") == ["a"]
+
+
+def test_message_too_long():
+    framer = MessageFramer(max_message=5)
+    with pytest.raises(FrameTooLong):
+        framer.feed(b"abcdef")
+    assert framer.feed(b"ok\n") == ["ok"]  # the oversized text is gone
+
+
+def test_message_at_limit():
+    assert MessageFramer(max_message=5).feed(b"abcde") == []
+
+
+def frame(payload):
+    return len(payload).to_bytes(4, 'big') + payload
+
+
+def test_frames_split_anywhere():
+    data = frame(b"one") + frame(b"") + frame("שתיים".encode('utf-8'))
+    for cut in range(len(data) + 1):
+        deframer = FrameDeframer()
+        assert deframer.feed(data[:cut]) + deframer.feed(data[cut:]) == [b"one", b"", "שתיים".encode('utf-8')]
+
+
+def test_frame_too_long():
+    with pytest.raises(FrameTooLong):
+        FrameDeframer(max_frame=8).feed((9).to_bytes(4, 'big'))
+
+
+def test_frame_at_limit():
+    payload = b"x" * MAX_FRAME
+    assert FrameDeframer().feed(frame(payload)) == [payload]
@@ -0,0 +1,52 @@
+import random
+import pytest
+import text_delta
+
+PAIRS = [
+    ("", ""),
+    ("", "שלום"),
+    ("שלום", ""),
+    ("שלום", "שלום"),
+    ("שלם", "שלום"),
+    ("שלום", "שלם"),
+    ("abc", "abxc"),
+    ("aaaa", "aa"),
+    ("abab", "ab"),
+    ("hello", "world"),
+]
+
+
+@pytest.mark.parametrize("old, new", PAIRS)
+def test_diff_apply_round_trip(old, new):
+    assert text_delta.apply(old, *text_delta.diff(old, new)) == new
+
+
+def test_random_round_trips():
+    rng = random.Random(7)
+    alphabet = "אבגדה:|ab"
+    for _ in range(2000):
+        old = "".join(rng.choice(alphabet) for _ in range(rng.randrange(8)))
+        new = "".join(rng.choice(alphabet) for _ in range(rng.randrange(8)))
+        delta = text_delta.decode(text_delta.encode(*text_delta.diff(old, new)))
+        assert text_delta.apply(old, *delta) == new
+
+
+def test_single_keystroke_is_small():
+    assert text_delta.diff("שלו", "שלום") == (3, 0, "ם")
+    assert text_delta.diff("שלום", "שלו") == (3, 1, "")
+
+
+def test_insert_may_contain_colons():
+    assert text_delta.decode(text_delta.encode(1, 0, "a:b:c")) == (1, 0, "a:b:c")
+
+
+@pytest.mark.parametrize("index, delete", [(-1, 0), (4, 0), (0, 4), (2, 2), (0, -1)])
+def test_apply_out_of_range(index, delete):
+    with pytest.raises(ValueError):
+        text_delta.apply("abc", index, delete, "")
+
+
+@pytest.mark.parametrize("value", ["", "1", "1:2", "x:0:", "0:y:"])
+def test_decode_malformed(value):
+    with pytest.raises(ValueError):
+        text_delta.decode(value)
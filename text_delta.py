@@ -0,0 +1,35 @@
+"""Edit operations for the live-typing stream.
+
+A delta "index:delete:insert" turns old text into new text by removing
+`delete` characters at `index` and inserting `insert` there. Clients send
+INPUT_DELTA|<delta>, the server forwards UPDATE_DELTA|<delta> to viewers
+and now and then a full UPDATE_INPUT|<text> checkpoint.
+"""
+
+
+def diff(old, new):
+    """The single edit (index, delete, insert) that turns old into new."""
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[-1 - end] == new[-1 - end]:
+        end += 1
+    return start, len(old) - start - end, new[start:len(new) - end]
+
+
+def apply(text, index, delete, insert):
+    if not 0 <= index <= len(text) or delete < 0 or index + delete > len(text):
+        raise ValueError(f"delta {index}:{delete} out of range for text of length {len(text)}")
+    return text[:index] + insert + text[index + delete:]
+
+
+def encode(index, delete, insert):
+    return f"{index}:{delete}:{insert}"
+
+
+def decode(value):
+    """Parse "index:delete:insert"; raises ValueError if it's malformed."""
+    index, delete, insert = value.split(":", 2)
+    return int(index), int(delete), insert
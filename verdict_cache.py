@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerdictCache:
+    """Bounded in-memory LRU of word verdicts backed by a SQLite file."""
+
+    def __init__(self, db_path='verdicts.db', max_size=10000, positive_ttl=30 * 24 * 3600, negative_ttl=24 * 3600):
+        self.max_size = max_size
+        self.positive_ttl = positive_ttl  # real words rarely stop being words
+        self.negative_ttl = negative_ttl  # but a rejected word may be added to the dictionary later
+        self.memory = OrderedDict()  # word -> (verdict, expires_at)
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS verdicts "
+                        "(word TEXT PRIMARY KEY, verdict INTEGER NOT NULL, expires_at REAL NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS verdicts_expires_at ON verdicts (expires_at)")
+        self.db.commit()
+
+    def get(self, word):
+        """Return the cached verdict for word, or None if unknown or expired."""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(word)
+            if entry is not None:
+                if entry[1] > now:
+                    self.memory.move_to_end(word)
+                    self.memory_hits += 1
+                    return entry[0]
+                del self.memory[word]
+
+            row = self.db.execute("SELECT verdict, expires_at FROM verdicts WHERE word = ?", (word,)).fetchone()
+            if row is not None and row[1] > now:
+                self._remember(word, bool(row[0]), row[1])
+                self.disk_hits += 1
+                return bool(row[0])
+
+            self.misses += 1
+            return None
+
+    def put(self, word, verdict):
+        expires_at = time.time() + (self.positive_ttl if verdict else self.negative_ttl)
+        with self.lock:
+            self._remember(word, verdict, expires_at)
+            self.db.execute("INSERT OR REPLACE INTO verdicts (word, verdict, expires_at) VALUES (?, ?, ?)",
+                            (word, int(verdict), expires_at))
+            self.db.commit()
+
+    def _remember(self, word, verdict, expires_at):
+        self.memory[word] = (verdict, expires_at)
+        self.memory.move_to_end(word)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)  # evict least recently used
+
+    def purge_expired(self):
+        """Delete expired rows; clients pick the words, so without this junk piles up forever."""
+        with self.lock:
+            deleted = self.db.execute("DELETE FROM verdicts WHERE expires_at <= ?", (time.time(),)).rowcount
+            self.db.commit()
+        return deleted
+
+    def stats(self):
+        """Hit/miss counters; every hit is a lookup that didn't go to the remote validator."""
+        with self.lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "size": len(self.memory),
+            }
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class CachedValidator:
+    """Wrap a validator so repeated words are answered from a VerdictCache."""
+
+    def __init__(self, validator, cache):
+        self.validator = validator
+        self.cache = cache
+
+    def is_valid(self, word):
+        verdict = self.cache.get(word)
+        if verdict is None:
+            verdict = self.validator.is_valid(word)
+            self.cache.put(word, verdict)
+        return verdict
@@ -0,0 +1,39 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+log = logging.getLogger("bombparty.verify")
+
+
+class VerificationPool:
+    """Run word verification on worker threads so the turn loop never blocks on it."""
+
+    def __init__(self, validator, verify, fallback=None, workers=4, timeout=3.0):
+        self.validator = validator
+        self.verify_fn = verify  # GameUtils.verify
+        self.fallback = fallback  # local validator used when a lookup takes too long
+        self.timeout = timeout
+        self.timeouts = 0
+        self.errors = 0
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verify")
+
+    def submit(self, word, letters):
+        return self.executor.submit(self.verify_fn, word, letters, self.validator)
+
+    def verify(self, word, letters):
+        """Verify on the pool, waiting at most `timeout` seconds for the answer."""
+        future = self.submit(word, letters)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            log.warning("lookup for %s timed out, using local verdict", word)
+            if self.fallback is not None:
+                return self.verify_fn(word, letters, self.fallback)
+            return False
+        except Exception as e:
+            self.errors += 1
+            log.warning("lookup for %s failed: %s", word, e)
+            return False
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -14,10 +14,7 @@ class Ui_MainWindow(object):
         MainWindow.setObjectName("MainWindow")
         MainWindow.resize(973, 650)
         MainWindow.setStyleSheet("""
-        /* Set background image for the main window */
-        QMainWindow {
-            border-image: url(images/Backgroundimg.jpg);
-        }
+        /* the background image is painted by BackgroundMixin (asset_cache.py) */
 
         /* QLabel Style */
         QLabel {
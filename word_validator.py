@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from verdict_cache import CachedValidator
+
+log = logging.getLogger("bombparty.verify")
+
+
+class LexiconValidator:
+    """Validate words against a local lexicon held in memory."""
+
+    def __init__(self, file_path, normalize):
+        self.normalize = normalize
+        self.words = self.load(file_path, normalize)
+
+    @staticmethod
+    def load(file_path, normalize):
+        # the index is keyed by the normalized form so final letters don't matter
+        with open(file_path, encoding='utf-8') as f:
+            return frozenset(normalize(line.strip()) for line in f if line.strip())
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return self.normalize(word) in self.words
+
+    def is_valid(self, word):
+        return word in self
+
+
+class LayeredValidator:
+    """Ask the local validator first and only go to the remote one for unknown words."""
+
+    def __init__(self, local, remote):
+        self.local = local
+        self.remote = remote
+
+    def is_valid(self, word):
+        return self.local.is_valid(word) or self.remote.is_valid(word)
+
+
+class MilogValidator:
+    """Validate words by scraping milog.co.il (slow, needs network)."""
+    url = "https://milog.co.il/"
+
+    def __init__(self, url=None, timeout=(1.0, 2.0), pool_size=8):
+        # imported here so the server runs without them when the scraper isn't used
+        import requests
+        from requests.adapters import HTTPAdapter
+        from bs4 import BeautifulSoup
+        self.BeautifulSoup = BeautifulSoup
+        if url:
+            self.url = url
+        self.timeout = timeout  # (connect, read) seconds - a hung request must never outlive a turn
+
+        # one keep-alive session shared by all verification workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def is_valid(self, word):
+        response = self.session.get(self.url + word, timeout=self.timeout)
+        response.raise_for_status()
+        soup = self.BeautifulSoup(response.text, 'html.parser')
+        div_content = soup.find('div', class_='sr_below_text')
+        if div_content:
+            sub_content = div_content.get_text().split(' ')
+            return sub_content[0] == "התקבלו" and sub_content[1].isnumeric()
+        return False
+
+
+class CircuitBreaker:
+    """Stop calling a failing remote for a while instead of waiting on it every turn."""
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            # half-open: let a request through once the cool-down is over
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+
+class ResilientValidator:
+    """Guard a remote validator with a circuit breaker and fall back to a local verdict."""
+
+    def __init__(self, remote, fallback=None, breaker=None):
+        self.remote = remote
+        self.fallback = fallback
+        self.breaker = breaker or CircuitBreaker()
+
+    def is_valid(self, word):
+        if self.breaker.allow():
+            try:
+                verdict = self.remote.is_valid(word)
+            except Exception as e:
+                log.warning("remote validator failed for %s: %s", word, e)
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+                return verdict
+        return self.local_verdict(word)
+
+    def local_verdict(self, word):
+        if self.fallback is not None:
+            return self.fallback.is_valid(word)
+        return False
+
+
+def make_validator(backend, lexicon, cache=None, url=None):
+    """Build a validator by name: 'lexicon', 'milog' or 'lexicon+milog'.
+
+    If a VerdictCache is given, lookups that reach milog go through it.
+    """
+    if backend == "lexicon":
+        return lexicon
+    if backend not in ("milog", "lexicon+milog"):
+        raise ValueError(f"Unknown validator backend: {backend}")
+
+    remote = MilogValidator(url)
+    if cache is not None:
+        remote = CachedValidator(remote, cache)
+    if backend == "milog":
+        return ResilientValidator(remote, fallback=lexicon)
+    # the lexicon already said no, so a failing remote just means "not a word"
+    return LayeredValidator(lexicon, ResilientValidator(remote))